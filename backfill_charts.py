@@ -0,0 +1,220 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+import mysql.connector
+import requests
+from utils import create_database_connection, parse_chart_table
+from chart_frame import to_chart_frame
+from chart_loader import WEEKLY_CHART_WEEKDAY, ensure_chart_partitions, load_chart_frame
+from logging_config import setup_logging
+
+# Backfill chart_entries from archived chart pages for a date range, e.g.
+#
+#   python backfill_charts.py --archive-url http://archive.local/charts \
+#       --start 2024-01-01 --end 2024-06-30 --sources global_daily,us_daily
+#
+# kworb only serves the current charts, so there is no default archive: --archive-url (or
+# CHART_ARCHIVE_URL) must name a server holding <source>/<YYYYMMDD>.html pages, such as
+# a mirror of saved pages or "python -m http.server" over a directory of fixtures.
+# Progress is checkpointed per (source, date) in BackfillProgress, so an interrupted run
+# resumes where it stopped.
+
+setup_logging()
+
+# Archived pages are served as {archive_url}/{source}/{YYYYMMDD}.html
+ARCHIVE_URL = os.environ.get("CHART_ARCHIVE_URL")
+
+WORKERS = 8
+REQUEST_TIMEOUT = 30
+# Log throughput every this many pages
+REPORT_EVERY = 50
+
+thread_local = threading.local()
+
+
+def archive_page_url(archive_url, source, chart_date):
+    return f"{archive_url.rstrip('/')}/{source}/{chart_date:%Y%m%d}.html"
+
+
+# Weekly charts are published once per week on their chart weekday, everything else daily
+def chart_dates(source, start, end):
+    step = timedelta(days=1)
+    day = start
+    if source.endswith("_weekly"):
+        step = timedelta(days=7)
+        day += timedelta(days=(WEEKLY_CHART_WEEKDAY - start.weekday()) % 7)
+    while day <= end:
+        yield day
+        day += step
+
+
+def create_progress_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS BackfillProgress (
+            source VARCHAR(64) NOT NULL,
+            chart_date DATE NOT NULL,
+            status VARCHAR(16) NOT NULL,
+            row_count INT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, chart_date)
+        );
+    """)
+
+
+# (source, date) pairs that need no more work: loaded, or known to be missing upstream
+def finished_work(cursor, sources, start, end, retry_missing):
+    statuses = ("done",) if retry_missing else ("done", "missing")
+    cursor.execute(f"""
+        SELECT source, chart_date FROM BackfillProgress
+        WHERE chart_date BETWEEN %s AND %s
+          AND source IN ({", ".join(["%s"] * len(sources))})
+          AND status IN ({", ".join(["%s"] * len(statuses))})
+    """, (start, end, *sources, *statuses))
+    return set(cursor.fetchall())
+
+
+def record_progress(conn, source, chart_date, status, row_count=None):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO BackfillProgress (source, chart_date, status, row_count)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE status = VALUES(status), row_count = VALUES(row_count)
+        """, (source, chart_date, status, row_count))
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+# Runs on a worker thread: fetch and parse one archived page.
+# Returns (status, frame, page size in bytes).
+def fetch_archived_chart(url):
+    if not hasattr(thread_local, "session"):
+        thread_local.session = requests.Session()
+    try:
+        response = thread_local.session.get(url, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 404:
+            return "missing", None, 0
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logging.error(f"Error fetching {url}: {e}")
+        return "failed", None, 0
+
+    headers, rows = parse_chart_table(response.content)
+    if headers is None:
+        logging.error(f"No chart table in {url}")
+        return "failed", None, len(response.content)
+    return "fetched", to_chart_frame(headers, rows), len(response.content)
+
+
+class Throughput:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.pages = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, rows, size):
+        self.pages += 1
+        self.rows += rows
+        self.bytes += size
+
+    def report(self, label="Backfill progress"):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        logging.info(
+            f"{label}: {self.pages} pages, {self.rows} rows, {self.bytes / 1024 ** 2:.1f} MB in {elapsed:.1f}s "
+            f"({self.pages / elapsed:.2f} pages/s, {self.rows / elapsed:.0f} rows/s)"
+        )
+
+
+def backfill(conn, sources, start, end, archive_url, workers=WORKERS, retry_missing=False):
+    cursor = conn.cursor()
+    create_progress_table(cursor)
+    ensure_chart_partitions(cursor, start, end)
+    finished = finished_work(cursor, sources, start, end, retry_missing)
+    conn.commit()
+    cursor.close()
+
+    work = [
+        (source, chart_date)
+        for source in sources
+        for chart_date in chart_dates(source, start, end)
+        if (source, chart_date) not in finished
+    ]
+    logging.info(f"{len(work)} pages to backfill, {len(finished)} already checkpointed")
+
+    throughput = Throughput()
+    statuses = {"done": 0, "missing": 0, "failed": 0}
+    pending = {}
+    work_iter = iter(work)
+
+    # Keep at most two pages per worker in flight so parsed frames never pile up
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(pending) < workers * 2:
+                item = next(work_iter, None)
+                if item is None:
+                    break
+                source, chart_date = item
+                future = executor.submit(fetch_archived_chart, archive_page_url(archive_url, source, chart_date))
+                pending[future] = item
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                source, chart_date = pending.pop(future)
+                status, frame, size = future.result()
+                row_count = None
+                if status == "fetched":
+                    row_count = load_chart_frame(conn, source, chart_date, frame)
+                    status = "done" if row_count else "failed"
+                try:
+                    record_progress(conn, source, chart_date, status, row_count)
+                except mysql.connector.Error as err:
+                    logging.error(f"Error checkpointing {source} {chart_date}: {err}")
+                statuses[status] += 1
+                throughput.add(row_count or 0, size)
+                if throughput.pages % REPORT_EVERY == 0:
+                    throughput.report()
+
+    throughput.report("Backfill finished")
+    logging.info(f"Backfill results: {statuses}")
+    return statuses
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable backfill of archived chart pages into chart_entries")
+    parser.add_argument("--start", type=parse_date, required=True, help="First chart date, YYYY-MM-DD")
+    parser.add_argument("--end", type=parse_date, required=True, help="Last chart date, YYYY-MM-DD")
+    parser.add_argument("--sources", default="global_daily", help="Comma separated chart names, e.g. global_daily,us_weekly")
+    parser.add_argument("--archive-url", default=ARCHIVE_URL, required=not ARCHIVE_URL,
+                        help="Base URL serving <source>/<YYYYMMDD>.html pages (default: CHART_ARCHIVE_URL)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Concurrent page fetches")
+    parser.add_argument("--retry-missing", action="store_true", help="Fetch again pages that were 404 last time")
+    args = parser.parse_args()
+
+    sources = [source.strip() for source in args.sources.split(",") if source.strip()]
+
+    conn, cursor = create_database_connection()
+    if not conn or not cursor:
+        logging.error("Database connection failed")
+        return
+
+    try:
+        backfill(conn, sources, args.start, args.end, args.archive_url, args.workers, args.retry_missing)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
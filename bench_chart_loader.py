@@ -0,0 +1,101 @@
+import argparse
+import logging
+import random
+import time
+from datetime import datetime
+from utils import create_database_connection
+from chart_loader import CHART_ENTRIES_TABLE, CHART_ENTRY_COLUMNS, replace_chart_entries
+from chart_frame import to_chart_frame, frame_records
+from logging_config import setup_logging
+
+# Compare the old per-row insert path against chart_loader's bulk load into
+# chart_entries on a synthetic global_daily chart. Needs the same MySQL database as daily.py.
+
+setup_logging()
+
+# Chart names only used by this benchmark, deleted again afterwards
+ROWWISE_CHART = "bench_rowwise"
+BULK_CHART = "bench_bulk"
+
+CHART_HEADERS = ("Pos", "P+", "Artist and Title", "Days", "Pk", "(x?)", "Streams", "Streams+", "7Day", "7Day+", "Total")
+
+
+def make_chart_rows(count):
+    rows = []
+    for pos in range(1, count + 1):
+        streams = random.randint(100000, 9000000)
+        rows.append((
+            str(pos),
+            random.choice(["+1", "-2", "=", "NEW", "RE"]),
+            f"Artist {pos} - Title {pos}",
+            str(random.randint(1, 900)),
+            str(random.randint(1, pos)),
+            "",
+            f"{streams:,}",
+            f"{random.randint(-50000, 50000):+,}",
+            f"{streams * 7:,}",
+            f"{random.randint(-90000, 90000):+,}",
+            f"{streams * 300:,}",
+        ))
+    return rows
+
+
+# The pre-bulk path: one execute and one log line per chart row
+def load_rowwise(conn, records):
+    cursor = conn.cursor()
+    insert_query = f"""
+    INSERT INTO {CHART_ENTRIES_TABLE} ({", ".join(CHART_ENTRY_COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(CHART_ENTRY_COLUMNS))})
+    """
+    for record in records:
+        cursor.execute(insert_query, record)
+        logging.info(f"Inserted data for artist {record[4]} and track {record[5]}")
+    conn.commit()
+    cursor.close()
+
+
+def report(label, count, elapsed):
+    print(f"{label:<10} {count:>7} rows in {elapsed:8.3f}s  ({count / elapsed:,.0f} rows/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-row vs bulk chart loading")
+    parser.add_argument("--rows", type=int, default=5000, help="Number of synthetic chart rows")
+    parser.add_argument("--quiet", action="store_true", help="Silence per-row INFO logging")
+    args = parser.parse_args()
+
+    if args.quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    rows = make_chart_rows(args.rows)
+    chart_date = datetime.now().date()
+    started = time.perf_counter()
+    frame = to_chart_frame(CHART_HEADERS, rows)
+    bulk_records = frame_records(frame, CHART_ENTRY_COLUMNS, chart=BULK_CHART, chart_date=chart_date)
+    report("parse", len(bulk_records), time.perf_counter() - started)
+    rowwise_records = frame_records(frame, CHART_ENTRY_COLUMNS, chart=ROWWISE_CHART, chart_date=chart_date)
+
+    conn, cursor = create_database_connection()
+    if not conn or not cursor:
+        logging.error("Database connection failed")
+        return
+
+    try:
+        started = time.perf_counter()
+        load_rowwise(conn, rowwise_records)
+        report("per-row", len(rowwise_records), time.perf_counter() - started)
+
+        started = time.perf_counter()
+        replace_chart_entries(conn, BULK_CHART, chart_date, bulk_records)
+        report("bulk", len(bulk_records), time.perf_counter() - started)
+    finally:
+        cursor.execute(
+            f"DELETE FROM {CHART_ENTRIES_TABLE} WHERE chart IN (%s, %s)", (ROWWISE_CHART, BULK_CHART)
+        )
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
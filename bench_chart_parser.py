@@ -0,0 +1,88 @@
+import argparse
+import glob
+import os
+import time
+import requests
+from utils import etree, iter_chart_rows_lxml, iter_chart_rows_soup
+
+# Compare the BeautifulSoup parse (dict per row, as fetch_top_chart_data used to build)
+# against the streaming lxml parser on saved kworb pages.
+#
+#   python bench_chart_parser.py --save        # download the pages below into fixtures/kworb
+#   python bench_chart_parser.py               # benchmark every saved fixture
+#
+# fixtures/kworb ships trimmed pages (60 rows each, kworb's markup) so the bench and the
+# parser parity tests run offline; --save replaces them with full current pages.
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "kworb")
+
+FIXTURE_URLS = {
+    "global_daily.html": "https://kworb.net/spotify/country/global_daily.html",
+    "global_weekly.html": "https://kworb.net/spotify/country/global_weekly.html",
+    "artists.html": "https://kworb.net/spotify/artists.html",
+    "listeners.html": "https://kworb.net/spotify/listeners.html",
+}
+
+
+def save_fixtures():
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, url in FIXTURE_URLS.items():
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        with open(os.path.join(FIXTURE_DIR, name), "wb") as f:
+            f.write(response.content)
+        print(f"Saved {url} ({len(response.content):,} bytes)")
+
+
+def parse_soup_dicts(content):
+    rows = iter_chart_rows_soup(content)
+    headers = next(rows)
+    return [dict(zip(headers, cells)) for cells in rows]
+
+
+def parse_lxml_stream(content):
+    rows = iter_chart_rows_lxml(content)
+    next(rows)
+    return sum(1 for _ in rows)
+
+
+def time_parser(parser, content, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parser(content)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark kworb chart parsers")
+    parser.add_argument("paths", nargs="*", help="Saved kworb pages (default: fixtures/kworb/*.html)")
+    parser.add_argument("--save", action="store_true", help="Download fresh fixtures before benchmarking")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per parser, best time is reported")
+    args = parser.parse_args()
+
+    if args.save:
+        save_fixtures()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+    if not paths:
+        print("No fixtures found, run with --save first")
+        return
+
+    for path in paths:
+        with open(path, "rb") as f:
+            content = f.read()
+        row_count = len(parse_soup_dicts(content))
+        soup_time = time_parser(parse_soup_dicts, content, args.repeat)
+        print(f"{os.path.basename(path):<20} {row_count:>6} rows  soup {soup_time * 1000:8.1f} ms", end="")
+        if etree is not None:
+            lxml_time = time_parser(parse_lxml_stream, content, args.repeat)
+            print(f"  lxml {lxml_time * 1000:8.1f} ms  ({soup_time / lxml_time:.1f}x)")
+        else:
+            print("  lxml not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import logging
+import numpy as np
+import pandas as pd
+from utils import fetch_top_chart_table
+
+logger = logging.getLogger(__name__)
+
+# kworb header -> typed column name, shared by every chart page we scrape
+COLUMN_NAMES = {
+    "Pos": "position",
+    "P+": "position_change",
+    "Artist and Title": "artist_and_title",
+    "Artist": "artist",
+    "Days": "days_on_chart",
+    "Wks": "weeks_on_chart",
+    "Pk": "peak_position",
+    "Peak": "peak_position",
+    "(x?)": "x_count",
+    "Streams": "streams",
+    "Streams+": "streams_change",
+    "7Day": "seven_day_streams",
+    "7Day+": "seven_day_change",
+    "Total": "total_streams",
+    "Daily": "daily",
+    "As lead": "as_lead",
+    "Solo": "solo",
+    "As feature": "as_feature",
+    "Listeners": "listeners",
+    "PkListeners": "peak_listeners",
+}
+
+# Columns holding kworb numbers ("1,234", "+56", "-7,890"), empty cells become 0
+NUMERIC_COLUMNS = (
+    "position", "days_on_chart", "weeks_on_chart", "peak_position", "streams", "streams_change",
+    "seven_day_streams", "seven_day_change", "total_streams", "daily", "as_lead", "solo",
+    "as_feature", "listeners", "peak_listeners",
+)
+
+
+# Convert a whole column of kworb numbers in one pass
+def to_numbers(column):
+    cleaned = column.str.replace(r"[,+\s]", "", regex=True).replace("", "0")
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+# Build a typed frame from (headers, rows) as returned by utils.parse_chart_table
+def to_chart_frame(headers, rows):
+    frame = pd.DataFrame.from_records(list(rows), columns=list(headers))
+    frame = frame.rename(columns=COLUMN_NAMES)
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+
+    for name in NUMERIC_COLUMNS:
+        if name in frame:
+            frame[name] = to_numbers(frame[name])
+
+    # Rows whose numbers could not be read are dropped rather than stored as 0
+    numeric = [name for name in NUMERIC_COLUMNS if name in frame]
+    malformed = frame[numeric].isna().any(axis=1)
+    if malformed.any():
+        logger.error(f"Dropping {int(malformed.sum())} malformed chart rows")
+        frame = frame[~malformed]
+
+    # Counts are whole numbers; kworb occasionally shows a fraction ("108,964.5"), which is
+    # rounded half away from zero instead of being truncated by the integer cast
+    values = frame[numeric]
+    fractional = int((values % 1 != 0).to_numpy().sum())
+    if fractional:
+        logger.warning(f"Rounding {fractional} fractional chart values")
+        frame[numeric] = np.sign(values) * np.floor(values.abs() + 0.5)
+    frame = frame.astype({name: "int64" for name in numeric})
+
+    # "P+" holds "+3", "-2", "=", "NEW" or "RE"; keep the raw marker next to typed columns
+    if "position_change" in frame:
+        change = frame["position_change"].str.strip()
+        frame["is_new"] = change.eq("NEW")
+        frame["is_reentry"] = change.eq("RE")
+        frame["position_delta"] = pd.to_numeric(change.replace("=", "0"), errors="coerce").astype("Int64")
+
+    if "artist_and_title" in frame:
+        parts = frame["artist_and_title"].str.split(" - ", n=1, expand=True)
+        parts = parts.reindex(columns=[0, 1]).fillna("").astype(str)
+        frame["artist"] = parts[0].str.strip()
+        frame["title"] = parts[1].str.strip()
+        frame = frame.drop(columns="artist_and_title")
+
+    return frame.reset_index(drop=True)
+
+
+# Fetch a kworb page straight into a typed frame, None when nothing could be fetched
+def fetch_chart_frame(url):
+    headers, rows = fetch_top_chart_table(url)
+    if headers is None:
+        return None
+    return to_chart_frame(headers, rows)
+
+
+# Turn selected frame columns into plain Python tuples for executemany
+def frame_records(frame, columns, **constants):
+    selected = frame.reindex(columns=list(columns))
+    for name, value in constants.items():
+        selected[name] = value
+    selected = selected.astype(object).where(selected.notna(), None)
+    return [tuple(row) for row in selected.to_numpy().tolist()]
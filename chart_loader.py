@@ -0,0 +1,130 @@
+import logging
+from datetime import date, timedelta
+import mysql.connector
+from chart_frame import frame_records
+
+logger = logging.getLogger(__name__)
+
+# Number of rows sent to the server per executemany round trip
+BATCH_SIZE = 1000
+
+CHART_ENTRIES_TABLE = "chart_entries"
+
+# Spotify's weekly charts cover Friday to Thursday and are dated by that Thursday
+WEEKLY_CHART_WEEKDAY = 3
+
+# Column order of records passed to replace_chart_entries
+CHART_ENTRY_COLUMNS = (
+    "chart", "chart_date", "position", "position_change", "artist", "title", "days_on_chart",
+    "weeks_on_chart", "peak_position", "x_count", "streams", "streams_change",
+    "seven_day_streams", "seven_day_change", "total_streams"
+)
+
+
+# Insert records with one executemany per batch instead of one execute per row
+def insert_records(cursor, table_name, columns, records, batch_size=BATCH_SIZE):
+    insert_query = f"""
+    INSERT INTO {table_name} ({", ".join(columns)})
+    VALUES ({", ".join(["%s"] * len(columns))})
+    """
+    for start in range(0, len(records), batch_size):
+        cursor.executemany(insert_query, records[start:start + batch_size])
+    return len(records)
+
+
+# Date of the latest weekly chart published on or before day
+def weekly_chart_date(day):
+    return day - timedelta(days=(day.weekday() - WEEKLY_CHART_WEEKDAY) % 7)
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def partition_order(partition):
+    bound, _ = partition
+    return (bound is None, bound)
+
+
+# Existing chart_entries partitions as (upper bound, name); the MAXVALUE partition has bound None
+def chart_partitions(cursor):
+    cursor.execute("""
+        SELECT partition_name, partition_description
+        FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+    """, (CHART_ENTRIES_TABLE,))
+    partitions = []
+    for name, description in cursor.fetchall():
+        bound = None if description == "MAXVALUE" else date.fromisoformat(description.strip("'"))
+        partitions.append((bound, name))
+    return sorted(partitions, key=partition_order)
+
+
+# Make sure every month between first_day and last_day has its own partition by
+# splitting the partition that currently covers it. DDL commits implicitly, so
+# call this before opening the load transaction. A table without partitions, or with
+# none covering a month, is logged and left alone; rows still load into an
+# unpartitioned table, and the server rejects rows no partition covers.
+def ensure_chart_partitions(cursor, first_day, last_day=None):
+    partitions = chart_partitions(cursor)
+    if not partitions:
+        logger.error(f"{CHART_ENTRIES_TABLE} is not partitioned, see db_creation.py; loading without monthly partitions")
+        return
+    names = {name for _, name in partitions}
+    month = month_start(first_day)
+    while month <= (last_day or first_day):
+        name = f"p{month:%Y%m}"
+        upper = next_month(month)
+        if name not in names:
+            bound, container = next(
+                ((bound, container) for bound, container in partitions if bound is None or bound > month),
+                (None, None)
+            )
+            if container is None:
+                logger.error(f"No {CHART_ENTRIES_TABLE} partition covers {month:%Y-%m} and there is no MAXVALUE "
+                             f"partition to split")
+                return
+            if bound != upper:
+                container_bound = "MAXVALUE" if bound is None else f"'{bound.isoformat()}'"
+                cursor.execute(f"""
+                    ALTER TABLE {CHART_ENTRIES_TABLE} REORGANIZE PARTITION {container} INTO (
+                        PARTITION {name} VALUES LESS THAN ('{upper.isoformat()}'),
+                        PARTITION {container} VALUES LESS THAN ({container_bound})
+                    )
+                """)
+                logger.info(f"Added partition {name} to {CHART_ENTRIES_TABLE}")
+                partitions = sorted(partitions + [(upper, name)], key=partition_order)
+                names.add(name)
+        month = upper
+
+
+# Replace one chart's entries for one date in a single transaction, so readers
+# see either the previous rows or the complete new chart, never a partial one
+def replace_chart_entries(conn, chart, chart_date, records, batch_size=BATCH_SIZE):
+    cursor = conn.cursor()
+    try:
+        ensure_chart_partitions(cursor, chart_date)
+        cursor.execute(
+            f"DELETE FROM {CHART_ENTRIES_TABLE} WHERE chart = %s AND chart_date = %s",
+            (chart, chart_date)
+        )
+        inserted = insert_records(cursor, CHART_ENTRIES_TABLE, CHART_ENTRY_COLUMNS, records, batch_size)
+        conn.commit()
+        logger.info(f"Loaded {inserted} {chart} rows for {chart_date} into {CHART_ENTRIES_TABLE}")
+        return inserted
+    except mysql.connector.Error as err:
+        conn.rollback()
+        logger.error(f"Error loading {chart} for {chart_date}: {err}")
+        return 0
+    finally:
+        cursor.close()
+
+
+# Load a typed chart frame (see chart_frame.to_chart_frame) as one chart's entries for chart_date
+def load_chart_frame(conn, chart, chart_date, frame, batch_size=BATCH_SIZE):
+    records = frame_records(frame, CHART_ENTRY_COLUMNS, chart=chart, chart_date=chart_date)
+    return replace_chart_entries(conn, chart, chart_date, records, batch_size)
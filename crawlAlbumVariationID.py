@@ -1,72 +1,160 @@
-import requests
-import mysql.connector
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import psutil
-
-def find_release_group_id(artist_name, album_name):
-    base_url = "https://musicbrainz.org/ws/2/release-group"
-    params = {
-        "fmt": "json",
-        "query": f'artist:"{artist_name}" AND releasegroup:"{album_name}"'
-    }
-    response = requests.get(base_url, params=params)
-    response_json = response.json()
-    
-    if response_json['release-groups']:
-        return response_json['release-groups'][0]['id']
-    else:
+import asyncio
+import logging
+from db_connection import get_database_connection, monitor_pool
+from resolution_cache import ResolutionCache
+from musicbrainz_client import MusicBrainzClient
+from musicbrainz_batch import release_group_clause, search_release_groups
+from resource_monitor import ResourceMonitor
+from logging_config import setup_logging
+
+setup_logging()
+
+# Persistent cache of (artist, album) -> release group MBID
+release_group_cache = ResolutionCache("release-group")
+
+async def find_release_group_id(client, artist_name, album_name):
+    cache_key = f"{artist_name}\x1f{album_name}"
+    found, cached = release_group_cache.get(cache_key)
+    if found:
+        return cached
+
+    response_json = await client.search("release-group", release_group_clause((artist_name, album_name)))
+    if response_json is None:
+        # Leave it uncached so the next run asks again
+        logging.error(f"MusicBrainz search for {artist_name} - {album_name} failed")
         return None
 
-def get_database_connection():
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="spotify_user",
-        password="password",
-        database="spotify_db"
-    )
-    return connection
+    release_group_id = response_json['release-groups'][0]['id'] if response_json.get('release-groups') else None
+    release_group_cache.put(cache_key, release_group_id)
+    return release_group_id
 
-def fetch_and_update_album(album):
+async def fetch_and_update_album(client, album):
     no, artist_name, album_name = album
-    release_group_id = find_release_group_id(artist_name, album_name)
+    release_group_id = await find_release_group_id(client, artist_name, album_name)
     return (release_group_id, no) if release_group_id else None
 
-def monitor_resources():
-    cpu_usage = psutil.cpu_percent(interval=1)
-    memory_info = psutil.virtual_memory()
-    print(f"CPU Usage: {cpu_usage}% | Available Memory: {memory_info.available / (1024 ** 2)} MB")
+# Albums read per keyset page
+PAGE_SIZE = 500
+# Lookups in flight at once
+WINDOW = 200
+# Resolved IDs written per commit
+COMMIT_EVERY = 100
 
-def update_albums_with_release_group_id():
-    conn = get_database_connection()
+# Albums still missing a release group, in primary-key pages so memory stays flat. The
+# artist crawl stores the MBID its discography links to, so only legacy rows and rows
+# scraped without a link are left for the search
+def album_pages(cursor, page_size=PAGE_SIZE):
+    after_no = 0
+    while True:
+        cursor.execute("""
+            SELECT no, artist, title FROM albums
+            WHERE album_id IS NULL AND no > %s
+            ORDER BY no LIMIT %s
+        """, (after_no, page_size))
+        albums = cursor.fetchall()
+        if not albums:
+            return
+        yield albums
+        after_no = albums[-1][0]
+
+# Uncached (artist, album) pairs of a page go out in batched OR queries first, so only
+# the ones no batch hit matched are searched one by one
+async def prefill_release_groups(client, albums):
+    pending = [
+        (artist_name, album_name) for _, artist_name, album_name in albums
+        if not release_group_cache.get(f"{artist_name}\x1f{album_name}")[0]
+    ]
+    for (artist_name, album_name), hit in (await search_release_groups(client, pending)).items():
+        release_group_cache.put(f"{artist_name}\x1f{album_name}", hit['id'])
+
+# album_id is unique, so a row resolving to a release group another row already holds is
+# left unresolved and logged for review; it may be a duplicate of that album or a bad match
+def write_updates(conn, updates):
+    if not updates:
+        return
     cursor = conn.cursor()
+    try:
+        release_group_ids = list({release_group_id for release_group_id, _ in updates})
+        cursor.execute(
+            f"SELECT album_id FROM albums WHERE album_id IN ({', '.join(['%s'] * len(release_group_ids))})",
+            release_group_ids
+        )
+        taken = {row[0] for row in cursor.fetchall()}
+        assigned, duplicates = [], []
+        for release_group_id, no in updates:
+            if release_group_id in taken:
+                duplicates.append((release_group_id, no))
+            else:
+                taken.add(release_group_id)
+                assigned.append((release_group_id, no))
 
-    cursor.execute("SELECT no, artist, title FROM albums")
-    albums = cursor.fetchall()
-
-    # Start with a lower number of workers and adjust based on performance
-    num_workers = 12  # Starting with the number of physical cores
-
-    with ThreadPoolExecutor(max_workers=num_workers) as executor:
-        futures = {executor.submit(fetch_and_update_album, album): album for album in albums}
-        updates = []
-        for future in as_completed(futures):
-            result = future.result()
-            if result:
-                updates.append(result)
-
-            # Monitor resources periodically
-            monitor_resources()
-
-    if updates:
-        cursor.executemany("""
-            UPDATE albums
-            SET album_id = %s
-            WHERE no = %s
-        """, updates)
+        if assigned:
+            cursor.executemany("""
+                UPDATE albums
+                SET album_id = %s
+                WHERE no = %s
+            """, assigned)
+        for release_group_id, no in duplicates:
+            logging.warning(f"Album no {no} resolves to release group {release_group_id} already held by another album, left unresolved")
         conn.commit()
+    finally:
+        cursor.close()
+
+# Stream albums through a bounded window of lookups over one pooled session and commit
+# every COMMIT_EVERY results, so an interrupted run keeps what it resolved and the next
+# run starts from the albums still NULL
+async def resolve_albums(conn, monitor, window=WINDOW, commit_every=COMMIT_EVERY):
+    read_cursor = conn.cursor()
+    pages = album_pages(read_cursor)
+    queued = []
+    pending = set()
+    updates = []
+    looked_up = resolved = 0
+    monitor.gauge("pending_lookups", lambda: len(pending))
+    monitor.gauge("queued_albums", lambda: len(queued))
+
+    try:
+        async with MusicBrainzClient() as client:
+            while True:
+                while len(pending) < window:
+                    if not queued:
+                        page = next(pages, None)
+                        if page is None:
+                            break
+                        await prefill_release_groups(client, page)
+                        queued = list(reversed(page))
+                    pending.add(asyncio.ensure_future(fetch_and_update_album(client, queued.pop())))
+                if not pending:
+                    break
 
-    cursor.close()
-    conn.close()
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    looked_up += 1
+                    result = task.result()
+                    if result:
+                        updates.append(result)
+                if len(updates) >= commit_every:
+                    write_updates(conn, updates)
+                    resolved += len(updates)
+                    updates = []
+                    logging.info(f"Looked up {looked_up} albums, {resolved} release group IDs committed")
+    finally:
+        # Keep whatever finished before an error or cancellation
+        write_updates(conn, updates)
+        resolved += len(updates)
+        read_cursor.close()
+    return looked_up, resolved
+
+def update_albums_with_release_group_id():
+    conn = get_database_connection()
+    try:
+        # Sampled on a background thread, off the result loop
+        with ResourceMonitor("crawlAlbumVariationID") as monitor:
+            monitor_pool(monitor)
+            looked_up, resolved = asyncio.run(resolve_albums(conn, monitor))
+        logging.info(f"Looked up {looked_up} albums, resolved {resolved} release group IDs")
+    finally:
+        conn.close()
 
-# Run the update function
-update_albums_with_release_group_id()
+if __name__ == "__main__":
+    update_albums_with_release_group_id()
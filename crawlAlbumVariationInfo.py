@@ -1,162 +1,239 @@
+import argparse
+import asyncio
 import json
 import logging
-import mysql.connector
-from selenium import webdriver
+import os
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import NoSuchElementException
 from concurrent.futures import ThreadPoolExecutor
-from db_connection import get_database_connection
-from threading import Semaphore
+from db_connection import get_database_connection, monitor_pool
+from rate_limiter import musicbrainz_limiter
+from resource_monitor import ResourceMonitor
+from webdriver_pool import driver_pool
+from dom_extract import RELEASE_GROUP_PAGE_SCRIPT, extract
+from pipeline import BatchWriter
+from musicbrainz_client import MusicBrainzClient
+from musicbrainz_json import fetch_release_group_data
 
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-semaphore = Semaphore(5)
+# "json" browses releases and their tracks through the ws/2 web service and only opens
+# Chrome when that fails, "selenium" always scrapes the release group page
+BACKEND = os.environ.get("ALBUM_VARIATION_BACKEND", "json")
+# How the Selenium path reads a page: "script" (one execute_script) or "elements"
+EXTRACTION = os.environ.get("SELENIUM_EXTRACTION", "script")
+
+# One execute_script returns the whole page; absent sections come back empty at once
+def extract_release_group_script(driver, release_group_id):
+    payload = extract(driver, RELEASE_GROUP_PAGE_SCRIPT)
+    if payload['wikipedia'] is None:
+        logger.warning(f"Wikipedia description not found for release group ID: {release_group_id}")
+    return {
+        'Wikipedia Description': payload['wikipedia'],
+        'Releases': payload['releases'],
+        'Album Image URL': payload['image'],
+        'Artist': payload['artist'],
+        'Album Type': payload['type'],
+        'Genres': payload['genres'],
+        'Other Tags': payload['tags']
+    }
+
+# Element-by-element extraction, one WebDriver call per row, cell and field
+def extract_release_group_elements(driver, release_group_id):
+    data = {}
+    # Extract Wikipedia description
+    try:
+        wikipedia_description = driver.find_element(By.CSS_SELECTOR, "div.wikipedia-extract-body").text
+        data['Wikipedia Description'] = wikipedia_description
+        logger.info(f"Extracted Wikipedia description for release group ID: {release_group_id}")
+    except NoSuchElementException:
+        data['Wikipedia Description'] = None
+        logger.warning(f"Wikipedia description not found for release group ID: {release_group_id}")
+
+    # Extract release information
+    releases = []
+    try:
+        release_rows = driver.find_elements(By.XPATH, "//table[contains(@class, 'tbl')]/tbody/tr")
+        for row in release_rows:
+            cells = row.find_elements(By.TAG_NAME, 'td')
+            if cells:
+                try:
+                    variation_id = cells[0].find_element(By.XPATH, ".//a[2]").get_attribute('href').split('/')[-1]
+                except NoSuchElementException:
+                    variation_id = None
+                releases.append({
+                    'Variation ID': variation_id,
+                    'Title': cells[0].text,
+                    'Artist': cells[1].text,
+                    'Format': cells[2].text,
+                    'Tracks': cells[3].text,
+                    'Country/Date': cells[4].text,
+                    'Label': cells[5].text
+                })
+        data['Releases'] = releases
+    except NoSuchElementException:
+        data['Releases'] = None
+        logger.warning(f"Release information not found for release group ID: {release_group_id}")
+    
+    # Extract the album cover image, artist, album type, genres, and other tags
+    try:
+        data['Album Image URL'] = driver.find_element(By.CSS_SELECTOR, "div.cover-art img").get_attribute('src')
+        data['Artist'] = driver.find_element(By.XPATH, "//dt[text()='Artist:']/following-sibling::dd").text
+        data['Album Type'] = driver.find_element(By.XPATH, "//dt[text()='Type:']/following-sibling::dd").text
+        data['Genres'] = [element.text for element in driver.find_elements(By.CSS_SELECTOR, "div#sidebar-tags div.genre-list a")]
+        data['Other Tags'] = [element.text for element in driver.find_elements(By.CSS_SELECTOR, "div#sidebar-tag-list a")]
+        logger.info(f"Extracted additional information for release group ID: {release_group_id}")
+    except NoSuchElementException:
+        data['Album Image URL'] = None
+        data['Artist'] = None
+        data['Album Type'] = None
+        data['Genres'] = None
+        data['Other Tags'] = None
+        logger.warning(f"Additional information not found for release group ID: {release_group_id}")
+    return data
 
 def scrape_musicbrainz_data(release_group_id):
-    with semaphore:
+    # A pooled browser, reset and handed back once the page is read
+    with driver_pool.lease() as driver:
         logger.info(f"Starting data scrape for release group ID: {release_group_id}")
 
-        # Set up headless Chrome options
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--log-level=3")  # Suppress non-critical logs
-
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
         url = f"https://musicbrainz.org/release-group/{release_group_id}"
+        musicbrainz_limiter.acquire()
         driver.get(url)
 
-        data = {}
-        try:
-            # Extract Wikipedia description
-            try:
-                wikipedia_description = driver.find_element(By.CSS_SELECTOR, "div.wikipedia-extract-body").text
-                data['Wikipedia Description'] = wikipedia_description
-                logger.info(f"Extracted Wikipedia description for release group ID: {release_group_id}")
-            except NoSuchElementException:
-                data['Wikipedia Description'] = None
-                logger.warning(f"Wikipedia description not found for release group ID: {release_group_id}")
-
-            # Extract release information
-            releases = []
-            try:
-                release_rows = driver.find_elements(By.XPATH, "//table[contains(@class, 'tbl')]/tbody/tr")
-                for row in release_rows:
-                    cells = row.find_elements(By.TAG_NAME, 'td')
-                    if cells:
-                        try:
-                            variation_id = cells[0].find_element(By.XPATH, ".//a[2]").get_attribute('href').split('/')[-1]
-                        except NoSuchElementException:
-                            variation_id = None
-                        releases.append({
-                            'Variation ID': variation_id,
-                            'Title': cells[0].text,
-                            'Artist': cells[1].text,
-                            'Format': cells[2].text,
-                            'Tracks': cells[3].text,
-                            'Country/Date': cells[4].text,
-                            'Label': cells[5].text
-                        })
-                data['Releases'] = releases
-            except NoSuchElementException:
-                data['Releases'] = None
-                logger.warning(f"Release information not found for release group ID: {release_group_id}")
-            
-            # Extract the album cover image, artist, album type, genres, and other tags
-            try:
-                data['Album Image URL'] = driver.find_element(By.CSS_SELECTOR, "div.cover-art img").get_attribute('src')
-                data['Artist'] = driver.find_element(By.XPATH, "//dt[text()='Artist:']/following-sibling::dd").text
-                data['Album Type'] = driver.find_element(By.XPATH, "//dt[text()='Type:']/following-sibling::dd").text
-                data['Genres'] = [element.text for element in driver.find_elements(By.CSS_SELECTOR, "div#sidebar-tags div.genre-list a")]
-                data['Other Tags'] = [element.text for element in driver.find_elements(By.CSS_SELECTOR, "div#sidebar-tag-list a")]
-                logger.info(f"Extracted additional information for release group ID: {release_group_id}")
-            except NoSuchElementException:
-                data['Album Image URL'] = None
-                data['Artist'] = None
-                data['Album Type'] = None
-                data['Genres'] = None
-                data['Other Tags'] = None
-                logger.warning(f"Additional information not found for release group ID: {release_group_id}")
-
-        finally:
-            driver.quit()
-            del driver
-
-        logger.info(f"Completed data scrape for release group ID: {release_group_id}")
-        return data
-
-
-def update_database(data, release_group_id):
-    connection = get_database_connection()
-    cursor = connection.cursor()
-
+        if EXTRACTION == "script":
+            data = extract_release_group_script(driver, release_group_id)
+        else:
+            data = extract_release_group_elements(driver, release_group_id)
+
+    logger.info(f"Completed data scrape for release group ID: {release_group_id}")
+    return data
+
+# Runs on the writer thread: one transaction for a batch of (release group ID, data) pairs
+def write_release_groups(cursor, release_groups):
+    # Update albums table
+    cursor.executemany("""
+    UPDATE albums
+    SET description=%s, image=%s, genres=%s, other_tags=%s
+    WHERE album_id=%s
+    """, [(
+        data.get('Wikipedia Description'),
+        data.get('Album Image URL'),
+        json.dumps(data.get('Genres')),
+        json.dumps(data.get('Other Tags')),
+        release_group_id
+    ) for release_group_id, data in release_groups])
+
+    variations = []
+    tracks = []
+    for release_group_id, data in release_groups:
+        # Web service data carries every release's tracks, so it replaces the group's
+        # variations and tracklists in the batch's transaction, keeping reruns idempotent
+        if data.get('Releases') and any('Tracklist' in release for release in data['Releases']):
+            cursor.execute("""
+                DELETE FROM tracklists
+                WHERE variation_id IN (SELECT variation_id FROM albumvariations WHERE album_id=%s)
+            """, (release_group_id,))
+            cursor.execute("DELETE FROM albumvariations WHERE album_id=%s", (release_group_id,))
+
+        for release in data.get('Releases') or []:
+            variations.append((
+                release_group_id,
+                release['Title'],
+                release['Artist'],
+                release['Format'],
+                release['Tracks'],
+                release['Country/Date'],
+                release['Label'],
+                release['Variation ID'],
+                release.get('Year')
+            ))
+            tracks.extend(
+                (track['album_id'], track['number'], track['title'], track['length_ms'],
+                 track['variation_id'], track['details'])
+                for track in release.get('Tracklist') or []
+            )
+
+    # Insert into albumvariations table, then the tracks that reference them
+    if variations:
+        cursor.executemany("""
+        INSERT INTO albumvariations (album_id, title, artist, format, tracks, country_date, labels, Variation_id, year)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, variations)
+    if tracks:
+        cursor.executemany("""
+        INSERT INTO tracklists (album_id, number, title, length_ms, variation_id, detail)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """, tracks)
+
+    logger.info(f"Database updated for {len(release_groups)} release groups, {len(variations)} variations, {len(tracks)} tracks")
+
+# Release groups per writer transaction
+WRITE_BATCH = 10
+
+# Scrape on a browser slot, then hand the result to the writer; blocks while its queue is full
+def worker(release_group_id, writer):
     try:
-        # Update albums table
-        sql_update_albums = """
-        UPDATE albums
-        SET description=%s, image=%s, genres=%s, other_tags=%s
-        WHERE album_id=%s
-        """
-        cursor.execute(sql_update_albums, (
-            data.get('Wikipedia Description'),
-            data.get('Album Image URL'),
-            json.dumps(data.get('Genres')),
-            json.dumps(data.get('Other Tags')),
-            release_group_id
-        ))
-
-        # Insert into albumvariations table
-        if data.get('Releases'):
-            for release in data['Releases']:
-                sql_insert_variations = """
-                INSERT INTO albumvariations (album_id, title, artist, format, tracks, country_date, labels, Variation_id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                cursor.execute(sql_insert_variations, (
-                    release_group_id,
-                    release['Title'],
-                    release['Artist'],
-                    release['Format'],
-                    release['Tracks'],
-                    release['Country/Date'],
-                    release['Label'],
-                    release['Variation ID']
-                ))
-
-        connection.commit()
-        logger.info(f"Database updated for release group ID: {release_group_id}")
+        writer.check()
+        writer.put((release_group_id, scrape_musicbrainz_data(release_group_id)))
     except Exception as e:
-        logger.error(f"Error updating database for release group ID: {release_group_id}: {e}")
-    finally:
-        cursor.close()
-        connection.close()
+        logger.error(f"Error scraping release group ID: {release_group_id}: {e}")
 
-def worker(release_group_id):
-    data = scrape_musicbrainz_data(release_group_id)
-    update_database(data, release_group_id)
+# JSON backend: one web service pass per release group covers its releases and their
+# tracks; Chrome only for groups the web service could not serve
+async def crawl_release_groups_json(album_ids, monitor, writer):
+    remaining = len(album_ids)
+    monitor.gauge("queue_depth", lambda: remaining)
+
+    async def crawl(release_group_id):
+        nonlocal remaining
+        try:
+            writer.check()
+            data = await fetch_release_group_data(client, release_group_id)
+            if data is None:
+                logger.warning(f"Web service lookup failed for release group ID: {release_group_id}, falling back to Selenium")
+                await asyncio.to_thread(worker, release_group_id, writer)
+            else:
+                await asyncio.to_thread(writer.put, (release_group_id, data))
+        except Exception as e:
+            logger.error(f"Error processing release group ID: {release_group_id}: {e}")
+        finally:
+            remaining -= 1
+
+    async with MusicBrainzClient() as client:
+        await asyncio.gather(*(crawl(album_id) for album_id in album_ids))
 
 def main():
+    parser = argparse.ArgumentParser(description="Crawl release group variations from MusicBrainz")
+    parser.add_argument("--backend", choices=("json", "selenium"), default=BACKEND, help="Fetch mode")
+    args = parser.parse_args()
+
     connection = get_database_connection()
     cursor = connection.cursor()
     album_ids = []
 
     try:
-        cursor.execute("SELECT album_id FROM albums")
+        cursor.execute("SELECT album_id FROM albums WHERE album_id IS NOT NULL")
         album_ids = [row[0] for row in cursor.fetchall()]
     finally:
         cursor.close()
         connection.close()
 
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        for album_id in album_ids:
-            executor.submit(worker, album_id)
+    with ResourceMonitor("crawlAlbumVariationInfo") as monitor, \
+            BatchWriter("albumvariations", write_release_groups, WRITE_BATCH) as writer:
+        monitor.gauge("writer_queue_depth", writer.queue_depth)
+        monitor.gauge("writer_batch_size", lambda: writer.last_batch_size)
+        monitor_pool(monitor)
+
+        if args.backend == "json":
+            asyncio.run(crawl_release_groups_json(album_ids, monitor, writer))
+            return
+
+        with ThreadPoolExecutor(max_workers=driver_pool.size) as executor:
+            futures = [executor.submit(worker, album_id, writer) for album_id in album_ids]
+            monitor.gauge("queue_depth", lambda: sum(not future.done() for future in futures))
 
 if __name__ == "__main__":
     main()
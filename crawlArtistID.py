@@ -1,52 +1,66 @@
-import requests
-import time
-from db_connection import get_database_connection
+import asyncio
+from db_connection import get_database_connection, monitor_pool
+from resolution_cache import ResolutionCache
+from musicbrainz_client import MusicBrainzClient
+from musicbrainz_batch import artist_clause, search_artists
+from name_normalization import NameIndex, normalize_name
+from resource_monitor import ResourceMonitor
 
-# Simple in-memory cache to store already fetched artist details
-artist_cache = {}
+# Persistent cache of normalized artist name -> (name, MBID), shared across runs and resolvers
+artist_cache = ResolutionCache("artist")
 
-def get_top_artist_id_and_name(artist_name, retries=3, backoff_factor=2):
-    if artist_name in artist_cache:
-        return artist_cache[artist_name]
+async def get_top_artist_id_and_name(client, artist_name):
+    found, cached = artist_cache.get(normalize_name(artist_name))
+    if found:
+        return tuple(cached) if cached else (None, None)
 
-    base_url = "https://musicbrainz.org/ws/2/artist/"  # Use HTTPS
-    params = {
-        "query": f'artist:"{artist_name}"',
-        "fmt": "json",
-        "limit": 1
-    }
-    headers = {"User-Agent": "YourAppName/1.0 (YourContactInfo)"}
+    # The client retries with backoff and returns None once it gives up
+    data = await client.search("artist", artist_clause(artist_name), limit=1)
+    if data is None:
+        return None, None
+    if data.get('artists'):
+        top_artist = data['artists'][0]
+        artist_cache.put(normalize_name(artist_name), (top_artist['name'], top_artist['id']))
+        return top_artist['name'], top_artist['id']
+    artist_cache.put(normalize_name(artist_name), None)
+    return None, None
 
-    for attempt in range(retries):
-        try:
-            response = requests.get(base_url, headers=headers, params=params, timeout=20)  # Increase timeout
-            response.raise_for_status()  # This will raise an exception for HTTP errors
-            data = response.json()
-            if 'artists' in data and data['artists']:
-                top_artist = data['artists'][0]
-                artist_cache[artist_name] = (top_artist['name'], top_artist['id'])
-                return top_artist['name'], top_artist['id']
-            else:
-                return None, None
-        except requests.RequestException as e:
-            print(f"HTTP Request failed (attempt {attempt + 1}): {e}")
-            if attempt < retries - 1:
-                time.sleep(backoff_factor ** attempt)  # Exponential backoff
-            else:
-                return None, None
-        except ValueError:
-            print("Error decoding JSON")
-            return None, None
+# Resolve every name over one pooled session; results come back in input order.
+# Uncached names go out in batched OR queries first and only the ones no batch hit
+# matched are looked up one by one.
+async def resolve_artists(artist_names):
+    resolved = {}
+    pending = []
+    for artist_name in dict.fromkeys(artist_names):
+        found, cached = artist_cache.get(normalize_name(artist_name))
+        if found:
+            resolved[artist_name] = tuple(cached) if cached else (None, None)
+        else:
+            pending.append(artist_name)
 
-def get_latest_table_name(db_connection):
+    async with MusicBrainzClient() as client:
+        for artist_name, hit in (await search_artists(client, pending)).items():
+            artist_cache.put(normalize_name(artist_name), (hit['name'], hit['id']))
+            resolved[artist_name] = hit['name'], hit['id']
+
+        unmatched = [artist_name for artist_name in pending if artist_name not in resolved]
+        results = await asyncio.gather(*(get_top_artist_id_and_name(client, name) for name in unmatched))
+        resolved.update(zip(unmatched, results))
+
+    return [resolved[artist_name] for artist_name in artist_names]
+
+# Chart whose latest entries feed the artist resolution pass
+CHART = "global_daily"
+
+def get_latest_chart_date(db_connection, chart=CHART):
     cursor = db_connection.cursor()
-    cursor.execute("SELECT latest_table_name FROM meta") 
+    cursor.execute("SELECT MAX(chart_date) FROM chart_entries WHERE chart = %s", (chart,))
     result = cursor.fetchone()
     return result[0] if result else None
 
-def fetch_artists_from_db(db_connection, table_name):
+def fetch_artists_from_db(db_connection, chart_date, chart=CHART):
     cursor = db_connection.cursor()
-    cursor.execute(f"SELECT DISTINCT artist FROM {table_name}")
+    cursor.execute("SELECT DISTINCT artist FROM chart_entries WHERE chart = %s AND chart_date = %s", (chart, chart_date))
     return [item[0] for item in cursor.fetchall()]
 
 def store_artist_data(db_connection, artist_name, artist_id):
@@ -56,19 +70,36 @@ def store_artist_data(db_connection, artist_name, artist_id):
                    (artist_name, artist_id))
     db_connection.commit()
 
+# Map every raw chart string to the MBIDs of its participants
+def store_name_keys(db_connection, name_index, artist_ids):
+    rows = [(raw_name, key, artist_ids.get(key)) for raw_name, key in name_index.pairs()]
+    if not rows:
+        return
+    cursor = db_connection.cursor()
+    cursor.executemany("""
+        INSERT INTO ArtistNameKeys (raw_name, name_key, artist_id) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE artist_id = COALESCE(VALUES(artist_id), artist_id)
+    """, rows)
+    db_connection.commit()
+
 def main():
     db_connection = get_database_connection()
-    latest_table_name = get_latest_table_name(db_connection)
-    if latest_table_name:
-        artist_names = fetch_artists_from_db(db_connection, latest_table_name)
-        for artist_name in artist_names:
-            name, artist_id = get_top_artist_id_and_name(artist_name)
+    latest_chart_date = get_latest_chart_date(db_connection)
+    if latest_chart_date:
+        # One lookup per real artist, not per raw spelling or collaboration string
+        name_index = NameIndex(fetch_artists_from_db(db_connection, latest_chart_date))
+        lookup_names = name_index.lookup_names()
+        with ResourceMonitor("crawlArtistID") as monitor:
+            monitor_pool(monitor)
+            results = asyncio.run(resolve_artists(list(lookup_names.values())))
+        artist_ids = {}
+        for key, (name, artist_id) in zip(lookup_names, results):
             if name and artist_id:
                 store_artist_data(db_connection, name, artist_id)
-            # Add a delay between requests to avoid hitting rate limits
-            time.sleep(1)  # Adjust the delay as needed (e.g., 1 second)
+                artist_ids[key] = artist_id
+        store_name_keys(db_connection, name_index, artist_ids)
     else:
-        print("Latest table name could not be found in the metadata table.")
+        print("No global_daily rows found in chart_entries.")
 
     db_connection.close()
 
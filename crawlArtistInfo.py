@@ -1,23 +1,30 @@
-import mysql.connector
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException
+import argparse
+import asyncio
 import logging
-from threading import Semaphore
+import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from db_connection import get_database_connection
+from db_connection import get_database_connection, monitor_pool
+from rate_limiter import musicbrainz_limiter
+from resource_monitor import ResourceMonitor
+from webdriver_pool import driver_pool
+from dom_extract import ARTIST_PAGE_SCRIPT, extract
+from pipeline import BatchWriter
+from utils import parse_int
+from musicbrainz_client import MusicBrainzClient
+from musicbrainz_json import fetch_artist_data
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Limit the number of concurrent Chrome instances to 10
-semaphore = Semaphore(5)
+# "json" reads the ws/2 web service and only opens Chrome when that fails, "selenium" always scrapes
+BACKEND = os.environ.get("ARTIST_INFO_BACKEND", "json")
+# How the Selenium path reads a page: "script" (one execute_script) or "elements"
+EXTRACTION = os.environ.get("SELENIUM_EXTRACTION", "script")
 
 # Function to get artist IDs from the database
 def get_artist_ids_from_db():
@@ -29,188 +36,287 @@ def get_artist_ids_from_db():
     db.close()
     return artist_ids
 
-# Function to insert artist data into the database
-def insert_artist_data_to_db(artist_data):
-    db = get_database_connection()
-    cursor = db.cursor()
+# MBIDs among ids that some row of table already holds
+def held_ids(cursor, table_name, key_column, ids):
+    ids = list({mbid for mbid in ids if mbid})
+    if not ids:
+        return set()
+    cursor.execute(
+        f"SELECT {key_column} FROM {table_name} WHERE {key_column} IN ({', '.join(['%s'] * len(ids))})", ids
+    )
+    return {row[0] for row in cursor.fetchall()}
 
+# Runs on the writer thread: one transaction for a batch of scraped artists
+def write_artist_data(cursor, artists):
     # Update the Artists table
-    update_artist_query = """
+    cursor.executemany("""
     UPDATE Artists
     SET wikipedia_extract = %s, type = %s, founded = %s, dissolved = %s,
         founded_in = %s, area = %s, genres = %s
     WHERE artist_id = %s
-    """
-    cursor.execute(update_artist_query, (
-        artist_data['Wikipedia Extract'], 
-        artist_data['Properties'].get('Type'), 
-        artist_data['Properties'].get('Founded'), 
+    """, [(
+        artist_data['Wikipedia Extract'],
+        artist_data['Properties'].get('Type'),
+        artist_data['Properties'].get('Founded'),
         artist_data['Properties'].get('Dissolved'),
-        ", ".join(artist_data['Properties'].get('Founded in', [])), 
-        ", ".join(artist_data['Properties'].get('Area', [])), 
-        ", ".join(artist_data['Genres']), 
+        ", ".join(artist_data['Properties'].get('Founded in', [])),
+        ", ".join(artist_data['Properties'].get('Area', [])),
+        ", ".join(artist_data['Genres']),
         artist_data['Artist ID']
-    ))
-
-    # Insert or Update the Album table
-    insert_album_query = """
-    INSERT INTO Albums (title, year, artist)
-    VALUES (%s, %s, %s)
-    ON DUPLICATE KEY UPDATE title = VALUES(title), year = VALUES(year), artist = VALUES(artist)
-    """
-    for album in artist_data['Albums']:
+    ) for artist_data in artists])
+
+    # Albums and singles are upserted on the release group MBID the discography links to, so
+    # crawlAlbumVariationID never has to search for it. Before that, each MBID claims a
+    # legacy row of the same artist and title that has none yet, so a re-crawl completes
+    # that row instead of adding a second copy of it. Rows scraped without an MBID are only
+    # inserted if the artist has no entry of that title yet.
+    albums = [
+        (album.get('Album ID'), artist_data['Artist ID'], album.get('Type'), album.get('Title'),
+         parse_int(album.get('Year')), album.get('Artist'))  # Use artist name from album data
+        for artist_data in artists for album in artist_data['Albums']
+    ]
+    held = held_ids(cursor, "Albums", "album_id", [album[0] for album in albums])
+    claims = {}
+    for album_id, artist_id, album_type, title, _, artist in albums:
+        if album_id and album_id not in held:
+            claims.setdefault(album_id, (album_id, artist_id, album_type, title, artist_id, artist))
+    if claims:
+        cursor.executemany("""
+        UPDATE Albums SET album_id = %s, artist_id = %s, type = %s
+        WHERE album_id IS NULL AND title = %s AND (artist_id = %s OR artist = %s)
+        ORDER BY no LIMIT 1
+        """, list(claims.values()))
+    with_id = [album for album in albums if album[0]]
+    if with_id:
+        cursor.executemany("""
+        INSERT INTO Albums (album_id, artist_id, type, title, year, artist)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE artist_id = COALESCE(artist_id, VALUES(artist_id)), type = VALUES(type),
+            title = VALUES(title), year = VALUES(year), artist = VALUES(artist)
+        """, with_id)
+    without_id = [album[1:] + (album[3], album[1], album[5]) for album in albums if not album[0]]
+    if without_id:
+        cursor.executemany("""
+        INSERT INTO Albums (artist_id, type, title, year, artist)
+        SELECT %s, %s, %s, %s, %s FROM DUAL
+        WHERE NOT EXISTS (SELECT 1 FROM Albums WHERE title = %s AND (artist_id = %s OR artist = %s))
+        """, without_id)
+
+    # Same for singles, keyed on single_id; their artist name is in feature
+    singles = [
+        (single.get('Album ID'), artist_data['Artist ID'], single.get('Title'), parse_int(single.get('Year')),
+         single.get('Artist'))  # Use artist name from single data
+        for artist_data in artists for single in artist_data['Singles']
+    ]
+    held = held_ids(cursor, "Singles", "single_id", [single[0] for single in singles])
+    claims = {}
+    for single_id, artist_id, title, _, feature in singles:
+        if single_id and single_id not in held:
+            claims.setdefault(single_id, (single_id, artist_id, title, artist_id, feature))
+    if claims:
+        cursor.executemany("""
+        UPDATE Singles SET single_id = %s, artist_id = %s
+        WHERE single_id IS NULL AND title = %s AND (artist_id = %s OR feature = %s)
+        ORDER BY no LIMIT 1
+        """, list(claims.values()))
+    with_id = [single for single in singles if single[0]]
+    if with_id:
+        cursor.executemany("""
+        INSERT INTO Singles (single_id, artist_id, title, year, feature)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE artist_id = COALESCE(artist_id, VALUES(artist_id)), title = VALUES(title),
+            year = VALUES(year), feature = VALUES(feature)
+        """, with_id)
+    without_id = [single[1:] + (single[2], single[1], single[4]) for single in singles if not single[0]]
+    if without_id:
+        cursor.executemany("""
+        INSERT INTO Singles (artist_id, title, year, feature)
+        SELECT %s, %s, %s, %s FROM DUAL
+        WHERE NOT EXISTS (SELECT 1 FROM Singles WHERE title = %s AND (artist_id = %s OR feature = %s))
+        """, without_id)
+
+    logger.info(f"Wrote {len(artists)} artists, {len(albums)} albums and {len(singles)} singles")
+
+
+# One execute_script returns the whole page; absent sections come back empty at once
+def extract_artist_script(driver, artist_id, artist_data):
+    payload = extract(driver, ARTIST_PAGE_SCRIPT)
+    artist_data['Wikipedia Extract'] = payload['wikipedia']
+    artist_data['Genres'] = payload['genres']
+    artist_data['Properties'] = payload['properties']
+    artist_data['Albums'] = payload['albums']
+    artist_data['Singles'] = payload['singles']
+    logger.info(f"Extracted artist ID {artist_id}: {len(artist_data['Albums'])} albums, {len(artist_data['Singles'])} singles")
+
+# MBID of the release group a discography title cell links to
+def release_group_link(cell):
+    links = cell.find_elements(By.CSS_SELECTOR, "a[href*='/release-group/']")
+    return links[0].get_attribute("href").rstrip("/").split("/")[-1] if links else None
+
+# Element-by-element extraction, one WebDriver call per row, cell and field
+def extract_artist_elements(driver, artist_id, artist_data, retries=3):
+    wait = WebDriverWait(driver, 20)
+
+    # Extracting Wikipedia extract text
+    for attempt in range(retries):
         try:
-            logger.info(f"Inserting/Updating Album: Title={album['Title']}, Year={album['Year']}, Artist={album['Artist']}")
-            cursor.execute(insert_album_query, (
-                album.get('Title'), 
-                album.get('Year'), 
-                album.get('Artist')  # Use artist name from album data
-            ))
-        except mysql.connector.Error as err:
-            logger.error(f"Error inserting/updating album: Title={album['Title']}, Year={album['Year']}, Artist={album['Artist']}, Error: {err}")
-
-    # Insert or Update the Single table
-    insert_single_query = """
-    INSERT INTO Singles (title, year, feature)
-    VALUES (%s, %s, %s)
-    ON DUPLICATE KEY UPDATE title = VALUES(title), year = VALUES(year), feature = VALUES(feature)
-    """
-    for single in artist_data['Singles']:
+            wikipedia_extract = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.wikipedia-extract-body"))).text
+            artist_data['Wikipedia Extract'] = wikipedia_extract
+            logger.info(f"Successfully retrieved Wikipedia extract for artist ID {artist_id}")
+            break
+        except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+            logger.warning(f"Retrying Wikipedia extract for artist ID {artist_id}, attempt {attempt + 1}")
+
+    # Extracting genres and other tags
+    for attempt in range(retries):
         try:
-            logger.info(f"Inserting/Updating Single: Title={single['Title']}, Year={single['Year']}, Feature={single['Artist']}")
-            cursor.execute(insert_single_query, (
-                single.get('Title'), 
-                single.get('Year'), 
-                single.get('Artist')  # Use artist name from single data
-            ))
-        except mysql.connector.Error as err:
-            logger.error(f"Error inserting/updating single: Title={single['Title']}, Year={single['Year']}, Feature={single['Artist']}, Error: {err}")
+            genres = [genre.text for genre in wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div#sidebar-tags a")))]
+            artist_data['Genres'] = genres
+            logger.info(f"Successfully retrieved genres for artist ID {artist_id}")
+            break
+        except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+            logger.warning(f"Retrying genres for artist ID {artist_id}, attempt {attempt + 1}")
 
+    # Extracting properties from the artist information sidebar using the specified XPath
+    for attempt in range(retries):
+        try:
+            properties_elements = wait.until(EC.presence_of_all_elements_located((By.XPATH, "/html/body/div[2]/div[2]/dl/dt")))
+            for dt in properties_elements:
+                if "ISNI code" not in dt.text:  # Exclude ISNI code
+                    dd = dt.find_element(By.XPATH, "./following-sibling::dd")
+                    if dd.find_elements(By.TAG_NAME, 'a'):
+                        artist_data['Properties'][dt.text.strip(':')] = [a.text for a in dd.find_elements(By.TAG_NAME, 'a')]
+                    else:
+                        artist_data['Properties'][dt.text.strip(':')] = dd.text
+                        logger.info(f"Retrieved property '{dt.text.strip(':')}' for artist ID {artist_id}: {dd.text}")
+            logger.info(f"Successfully retrieved properties for artist ID {artist_id}")
+            break
+        except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+            logger.warning(f"Retrying properties for artist ID {artist_id}, attempt {attempt + 1}")
 
-    db.commit()
-    cursor.close()
-    db.close()
+    # Extracting album details
+    for attempt in range(retries):
+        try:
+            album_section = wait.until(EC.presence_of_element_located((By.XPATH, "//h3[text()='Album']")))
+            album_table = album_section.find_element(By.XPATH, "./following-sibling::table")
+            album_rows = album_table.find_elements(By.XPATH, ".//tbody/tr")
+            for row in album_rows:
+                cells = row.find_elements(By.TAG_NAME, 'td')
+                if cells:
+                    artist_data['Albums'].append({
+                        'Album ID': release_group_link(cells[1]),
+                        'Type': 'Album',
+                        'Year': cells[0].text,
+                        'Title': cells[1].text,
+                        'Artist': cells[2].text
+                    })
+            logger.info(f"Successfully retrieved albums for artist ID {artist_id}")
+            break
+        except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+            logger.warning(f"Retrying albums for artist ID {artist_id}, attempt {attempt + 1}")
 
+    # Extracting single details
+    for attempt in range(retries):
+        try:
+            single_section = wait.until(EC.presence_of_element_located((By.XPATH, "//h3[text()='Single']")))
+            single_table = single_section.find_element(By.XPATH, "./following-sibling::table")
+            single_rows = single_table.find_elements(By.XPATH, ".//tbody/tr")
+            for row in single_rows:
+                cells = row.find_elements(By.TAG_NAME, 'td')
+                if cells:
+                    artist_data['Singles'].append({
+                        'Album ID': release_group_link(cells[1]),
+                        'Type': 'Single',
+                        'Year': cells[0].text,
+                        'Title': cells[1].text,
+                        'Artist': cells[2].text
+                    })
+            logger.info(f"Successfully retrieved singles for artist ID {artist_id}")
+            break
+        except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+            logger.warning(f"Retrying singles for artist ID {artist_id}, attempt {attempt + 1}")
 
-# Function to crawl MusicBrainz for artist details
+# Function to crawl MusicBrainz for artist details; only browses, the writer stores the result
 def crawl_musicbrainz(artist_id, retries=3):
-    with semaphore:
-        # Set up headless Chrome options
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--log-level=3")  # Suppress non-critical logs
-
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    artist_data = {
+        'Artist ID': artist_id,
+        'Wikipedia Extract': None,
+        'Genres': [],
+        'Properties': {},
+        'Albums': [],
+        'Singles': []
+    }
+
+    # A pooled browser, reset and handed back once the page is read
+    with driver_pool.lease() as driver:
+        musicbrainz_limiter.acquire()
         driver.get(f"https://musicbrainz.org/artist/{artist_id}")
-        wait = WebDriverWait(driver, 20)
-        
-        artist_data = {
-            'Artist ID': artist_id,
-            'Wikipedia Extract': None,
-            'Genres': [],
-            'Properties': {},
-            'Albums': [],
-            'Singles': []
-        }
-        
-        try:
-            # Extracting Wikipedia extract text
-            for attempt in range(retries):
-                try:
-                    wikipedia_extract = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.wikipedia-extract-body"))).text
-                    artist_data['Wikipedia Extract'] = wikipedia_extract
-                    logger.info(f"Successfully retrieved Wikipedia extract for artist ID {artist_id}")
-                    break
-                except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
-                    logger.warning(f"Retrying Wikipedia extract for artist ID {artist_id}, attempt {attempt + 1}")
-
-            # Extracting genres and other tags
-            for attempt in range(retries):
-                try:
-                    genres = [genre.text for genre in wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div#sidebar-tags a")))]
-                    artist_data['Genres'] = genres
-                    logger.info(f"Successfully retrieved genres for artist ID {artist_id}")
-                    break
-                except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
-                    logger.warning(f"Retrying genres for artist ID {artist_id}, attempt {attempt + 1}")
-
-            # Extracting properties from the artist information sidebar using the specified XPath
-            for attempt in range(retries):
-                try:
-                    properties_elements = wait.until(EC.presence_of_all_elements_located((By.XPATH, "/html/body/div[2]/div[2]/dl/dt")))
-                    for dt in properties_elements:
-                        if "ISNI code" not in dt.text:  # Exclude ISNI code
-                            dd = dt.find_element(By.XPATH, "./following-sibling::dd")
-                            if dd.find_elements(By.TAG_NAME, 'a'):
-                                artist_data['Properties'][dt.text.strip(':')] = [a.text for a in dd.find_elements(By.TAG_NAME, 'a')]
-                            else:
-                                artist_data['Properties'][dt.text.strip(':')] = dd.text
-                                logger.info(f"Retrieved property '{dt.text.strip(':')}' for artist ID {artist_id}: {dd.text}")
-                    logger.info(f"Successfully retrieved properties for artist ID {artist_id}")
-                    break
-                except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
-                    logger.warning(f"Retrying properties for artist ID {artist_id}, attempt {attempt + 1}")
-
-            # Extracting album details
-            for attempt in range(retries):
-                try:
-                    album_section = wait.until(EC.presence_of_element_located((By.XPATH, "//h3[text()='Album']")))
-                    album_table = album_section.find_element(By.XPATH, "./following-sibling::table")
-                    album_rows = album_table.find_elements(By.XPATH, ".//tbody/tr")
-                    for row in album_rows:
-                        cells = row.find_elements(By.TAG_NAME, 'td')
-                        if cells:
-                            artist_data['Albums'].append({
-                                'Year': cells[0].text,
-                                'Title': cells[1].text,
-                                'Artist': cells[2].text
-                            })
-                    logger.info(f"Successfully retrieved albums for artist ID {artist_id}")
-                    break
-                except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
-                    logger.warning(f"Retrying albums for artist ID {artist_id}, attempt {attempt + 1}")
-
-            # Extracting single details
-            for attempt in range(retries):
-                try:
-                    single_section = wait.until(EC.presence_of_element_located((By.XPATH, "//h3[text()='Single']")))
-                    single_table = single_section.find_element(By.XPATH, "./following-sibling::table")
-                    single_rows = single_table.find_elements(By.XPATH, ".//tbody/tr")
-                    for row in single_rows:
-                        cells = row.find_elements(By.TAG_NAME, 'td')
-                        if cells:
-                            artist_data['Singles'].append({
-                                'Year': cells[0].text,
-                                'Title': cells[1].text,
-                                'Artist': cells[2].text
-                            })
-                    logger.info(f"Successfully retrieved singles for artist ID {artist_id}")
-                    break
-                except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
-                    logger.warning(f"Retrying singles for artist ID {artist_id}, attempt {attempt + 1}")
+        if EXTRACTION == "script":
+            extract_artist_script(driver, artist_id, artist_data)
+        else:
+            extract_artist_elements(driver, artist_id, artist_data, retries)
+
+    return artist_data
+
+# Artists per writer transaction
+WRITE_BATCH = 20
 
+# Scrape on a browser slot, then hand the result to the writer; blocks while its queue is full
+def scrape_artist(artist_id, writer):
+    writer.check()
+    writer.put(crawl_musicbrainz(artist_id))
+
+# JSON backend: every artist is a coroutine on one pooled client; Chrome only for failures
+async def crawl_artists_json(artist_ids, monitor, writer):
+    remaining = len(artist_ids)
+    monitor.gauge("queue_depth", lambda: remaining)
+
+    async def crawl(artist_id):
+        nonlocal remaining
+        try:
+            writer.check()
+            artist_data = await fetch_artist_data(client, artist_id)
+            if artist_data is None:
+                logger.warning(f"Web service lookup failed for artist ID {artist_id}, falling back to Selenium")
+                await asyncio.to_thread(scrape_artist, artist_id, writer)
+            else:
+                await asyncio.to_thread(writer.put, artist_data)
+        except Exception as e:
+            logger.error(f"Error processing artist ID {artist_id}: {e}")
         finally:
-            driver.quit()
-        
-        insert_artist_data_to_db(artist_data)
+            remaining -= 1
 
-# Fetch artist IDs from the database
-artist_ids = get_artist_ids_from_db()
+    async with MusicBrainzClient() as client:
+        await asyncio.gather(*(crawl(artist_id) for artist_id in artist_ids))
 
 # Crawl data and insert into database for each artist ID using concurrency
 def main():
-    with ThreadPoolExecutor(max_workers=5) as executor:  # Adjust max_workers based on your system's capacity
-        futures = {executor.submit(crawl_musicbrainz, artist_id): artist_id for artist_id in artist_ids}
-        for future in as_completed(futures):
-            artist_id = futures[future]
-            try:
-                future.result()
-                logger.info(f"Data for artist ID {artist_id} has been inserted into the database.")
-            except Exception as e:
-                logger.error(f"Error processing artist ID {artist_id}: {e}")
+    parser = argparse.ArgumentParser(description="Crawl artist details from MusicBrainz")
+    parser.add_argument("--backend", choices=("json", "selenium"), default=BACKEND, help="Fetch mode")
+    args = parser.parse_args()
+
+    # Fetch artist IDs from the database
+    artist_ids = get_artist_ids_from_db()
+
+    with ResourceMonitor("crawlArtistInfo") as monitor, BatchWriter("artists", write_artist_data, WRITE_BATCH) as writer:
+        monitor.gauge("writer_queue_depth", writer.queue_depth)
+        monitor.gauge("writer_batch_size", lambda: writer.last_batch_size)
+        monitor_pool(monitor)
+
+        if args.backend == "json":
+            asyncio.run(crawl_artists_json(artist_ids, monitor, writer))
+            return
+
+        with ThreadPoolExecutor(max_workers=driver_pool.size) as executor:
+            futures = {executor.submit(scrape_artist, artist_id, writer): artist_id for artist_id in artist_ids}
+            monitor.gauge("queue_depth", lambda: sum(not future.done() for future in futures))
+            for future in as_completed(futures):
+                artist_id = futures[future]
+                try:
+                    future.result()
+                    logger.info(f"Data for artist ID {artist_id} has been scraped.")
+                except Exception as e:
+                    logger.error(f"Error processing artist ID {artist_id}: {e}")
 
 if __name__ == "__main__":
     main()
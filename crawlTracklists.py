@@ -1,14 +1,16 @@
 import json
+import queue
 import re
 import threading
 import logging
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import NoSuchElementException
-from db_connection import get_database_connection
+from db_connection import get_database_connection, monitor_pool
+from rate_limiter import musicbrainz_limiter
+from resource_monitor import ResourceMonitor
+from webdriver_pool import driver_pool
+from pipeline import BatchWriter
+from utils import parse_duration_ms, parse_track_number
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,22 +22,17 @@ def parse_track_details(details):
     matches = pattern.findall(details)
     return {match[0].strip(): match[1].strip() for match in matches}
 
-def scrape_release_data(release_id, cache, semaphore):
+# Scrape one release page of the release group album_id; the tracks are returned to the
+# calling worker, never shared
+def scrape_release_data(release_id, album_id=None):
     logger.debug(f"Starting to scrape data for release ID {release_id}")
-    
-    # Set up headless Chrome options
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--log-level=3")  # Suppress non-critical logs
-
-    driver = None
-    with semaphore:
+    tracks = []
+
+    # A pooled browser, reset and handed back once the page is read
+    with driver_pool.lease() as driver:
         try:
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
             url = f"https://musicbrainz.org/release/{release_id}"
+            musicbrainz_limiter.acquire()
             driver.get(url)
 
             track_elements = driver.find_elements(By.CSS_SELECTOR, 'table.tbl > tbody > tr')
@@ -61,12 +58,17 @@ def scrape_release_data(release_id, cache, semaphore):
                     length = track_dict.pop('Length')
                     number = track_dict.pop('Number')
                     variation_id = track_dict.pop('Variation_id')
+
+                    # Vinyl positions such as "A1" don't fit the INT column, keep them in the details
+                    if parse_track_number(number) is None:
+                        track_dict['Position'] = number
                     details = json.dumps(track_dict)
 
-                    cache.append({
+                    tracks.append({
+                        'album_id': album_id,
                         'title': title,
-                        'length': length,
-                        'number': number,
+                        'length_ms': parse_duration_ms(length),
+                        'number': parse_track_number(number),
                         'variation_id': variation_id,
                         'details': details
                     })
@@ -75,69 +77,90 @@ def scrape_release_data(release_id, cache, semaphore):
 
         except NoSuchElementException as e:
             logger.error(f"Some elements were not found for release ID {release_id}: {e}")
-        finally:
-            if driver:
-                driver.quit()
-                logger.debug(f"Closed ChromeDriver for release ID {release_id}")
-
-def insert_data_into_db(cache, db_connection):
-    cursor = db_connection.cursor()
-
-    for track in cache:
-        sql = """
-        INSERT INTO tracklists (number, title, length, variation_id, detail)
-        VALUES (%s, %s, %s, %s, %s)
-        """
-        cursor.execute(sql, (
-            track['number'],
-            track['title'],
-            track['length'],
-            track['variation_id'],
-            track['details']
-        ))
-
-    db_connection.commit()
-    cursor.close()
-    logger.info(f"Inserted {len(cache)} tracks into the database")
-
-def fetch_variation_ids(db_connection):
-    cursor = db_connection.cursor()
-    cursor.execute("SELECT variation_id FROM albumvariations")
-    result = cursor.fetchall()
-    cursor.close()
-    logger.debug(f"Fetched {len(result)} variation IDs from albumvariations")
-    return [row[0] for row in result]
-
-def worker(release_id, cache, semaphore):
-    logger.debug(f"Worker started for release ID {release_id}")
-    db_connection = get_database_connection()
-    try:
-        scrape_release_data(release_id, cache, semaphore)
-        insert_data_into_db(cache, db_connection)
-        cache.clear()
-    finally:
-        db_connection.close()
-        logger.debug(f"Worker finished for release ID {release_id}")
-
-# Main script
-cache = []
 
-# Semaphore to limit the number of concurrent ChromeDriver instances
-semaphore = threading.Semaphore(5)
-
-db_connection = get_database_connection()
-release_ids = fetch_variation_ids(db_connection)
-db_connection.close()
+    return tracks
+
+# Crawler threads leasing browsers at once, matching the WebDriver pool
+WORKERS = driver_pool.size
+# Variation IDs read per keyset page
+PAGE_SIZE = 1000
+# Releases per writer transaction
+WRITE_BATCH = 20
+
+# Runs on the writer thread: one executemany for the tracks of a batch of releases
+def write_tracks(cursor, releases):
+    cursor.executemany("""
+        INSERT INTO tracklists (album_id, number, title, length_ms, variation_id, detail)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, [
+        (track['album_id'], track['number'], track['title'], track['length_ms'], track['variation_id'], track['details'])
+        for tracks in releases for track in tracks
+    ])
+
+# (variation_id, album_id) of variations without tracks yet, in primary-key pages so memory stays flat.
+# Variations the web service backend of crawlAlbumVariationInfo already filled are skipped.
+def variation_id_pages(db_connection, page_size=PAGE_SIZE):
+    after_no = 0
+    while True:
+        cursor = db_connection.cursor()
+        cursor.execute("""
+            SELECT no, variation_id, album_id FROM albumvariations av
+            WHERE no > %s AND variation_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM tracklists t WHERE t.variation_id = av.variation_id)
+            ORDER BY no LIMIT %s
+        """, (after_no, page_size))
+        rows = cursor.fetchall()
+        cursor.close()
+        db_connection.commit()
+        if not rows:
+            return
+        logger.debug(f"Fetched {len(rows)} variation IDs from albumvariations")
+        yield [(row[1], row[2]) for row in rows]
+        after_no = rows[-1][0]
+
+def worker(work_queue, writer):
+    while True:
+        release = work_queue.get()
+        if release is None:
+            return
+        release_id, album_id = release
+        try:
+            writer.check()
+            tracks = scrape_release_data(release_id, album_id)
+            if tracks:
+                writer.put(tracks)
+        except Exception as e:
+            logger.error(f"Error scraping release ID {release_id}: {e}")
+
+# A fixed set of crawler threads fed from a bounded queue, with one batching writer,
+# so thread count and memory stay the same however many variations are waiting
+def main():
+    work_queue = queue.Queue(maxsize=WORKERS * 2)
+    db_connection = get_database_connection()
 
-logger.debug(f"Starting threads for release IDs: {release_ids}")
+    with ResourceMonitor("crawlTracklists") as monitor, BatchWriter("tracklists", write_tracks, WRITE_BATCH) as writer:
+        monitor.gauge("queue_depth", work_queue.qsize)
+        monitor.gauge("writer_queue_depth", writer.queue_depth)
+        monitor.gauge("writer_batch_size", lambda: writer.last_batch_size)
+        monitor_pool(monitor)
 
-threads = []
-for release_id in release_ids:
-    t = threading.Thread(target=worker, args=(release_id, cache, semaphore))
-    threads.append(t)
-    t.start()
+        threads = [threading.Thread(target=worker, args=(work_queue, writer)) for _ in range(WORKERS)]
+        for t in threads:
+            t.start()
+        try:
+            for page in variation_id_pages(db_connection):
+                # Stop feeding scrapers once there is no writer left to store their results
+                writer.check()
+                for release in page:
+                    work_queue.put(release)
+        finally:
+            for _ in threads:
+                work_queue.put(None)
+            for t in threads:
+                t.join()
+            db_connection.close()
 
-for t in threads:
-    t.join()
+    logger.info("Data scraped and saved correctly.")
 
-logger.info("Data scraped and saved correctly.")
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,125 @@
+import logging
+import os
+import threading
+import time
 import mysql.connector
+from dbutils.pooled_db import PooledDB
+
+logger = logging.getLogger(__name__)
+
+# One MySQL connection pool per process, shared by every script. get_database_connection()
+# leases a connection and close() hands it back instead of tearing it down, so a crawl over
+# thousands of entities pays for a handful of handshakes. The pool is configured from the
+# same DB_* variables as the .env file, checks a connection with a ping before leasing it
+# out (reconnecting if the server dropped it) and records how long leases wait and last.
+#
+#   with get_database_connection() as db:
+#       cursor = db.cursor()
+
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_PORT = int(os.environ.get("DB_PORT", "3306"))
+DB_USER = os.environ.get("DB_USER", "spotify_user")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "password")
+DB_NAME = os.environ.get("DB_NAME", "spotify_db")
+
+# Most connections open at once; further leases wait for one to be handed back
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+# Idle connections kept open between leases
+POOL_IDLE = int(os.environ.get("DB_POOL_IDLE", "5"))
+# DBUtils ping mode: 0 never, 1 when leased, 7 also before every query
+POOL_PING = int(os.environ.get("DB_POOL_PING", "1"))
+# Reopen a connection after this many queries (0 never), so server-side state cannot pile up
+POOL_MAX_USAGE = int(os.environ.get("DB_POOL_MAX_USAGE", "0"))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "leases": 0,
+    "in_use": 0,
+    "wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+    "lease_seconds": 0.0,
+    "max_lease_seconds": 0.0,
+}
+
+
+def _get_pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        # A forked worker must not reuse the parent's sockets
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = PooledDB(
+                creator=mysql.connector,
+                mincached=0,
+                maxcached=POOL_IDLE,
+                maxconnections=POOL_SIZE,
+                blocking=True,
+                maxusage=POOL_MAX_USAGE or None,
+                ping=POOL_PING,
+                host=DB_HOST,
+                port=DB_PORT,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                database=DB_NAME
+            )
+            _pool_pid = os.getpid()
+            logger.info(f"MySQL pool for {DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}, up to {POOL_SIZE} connections")
+        return _pool
+
+
+class PooledConnection:
+    # Proxy for a leased connection; close() (or leaving a with block) returns it to the pool
+    def __init__(self, connection, wait_seconds):
+        self._connection = connection
+        self._leased_at = time.monotonic()
+        self._closed = False
+        with _stats_lock:
+            _stats["leases"] += 1
+            _stats["in_use"] += 1
+            _stats["wait_seconds"] += wait_seconds
+            _stats["max_wait_seconds"] = max(_stats["max_wait_seconds"], wait_seconds)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        lease_seconds = time.monotonic() - self._leased_at
+        with _stats_lock:
+            _stats["in_use"] -= 1
+            _stats["lease_seconds"] += lease_seconds
+            _stats["max_lease_seconds"] = max(_stats["max_lease_seconds"], lease_seconds)
+        self._connection.close()
+
 
 def get_database_connection():
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="spotify_user",
-        password="password",
-        database="spotify_db"
-    )
-    return connection
+    started = time.monotonic()
+    connection = _get_pool().connection()
+    return PooledConnection(connection, time.monotonic() - started)
+
+
+# Lease counters for ResourceMonitor gauges, e.g. pool_stats()["in_use"]
+def pool_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["pool_size"] = POOL_SIZE
+    return stats
+
+
+# Register the pool's gauges on a ResourceMonitor
+def monitor_pool(monitor):
+    monitor.gauge("db_connections_in_use", lambda: pool_stats()["in_use"])
+    monitor.gauge("db_leases", lambda: pool_stats()["leases"])
+    monitor.gauge("db_lease_wait_seconds_max", lambda: pool_stats()["max_wait_seconds"])
+    monitor.gauge("db_lease_seconds_max", lambda: pool_stats()["max_lease_seconds"])
@@ -1,12 +1,7 @@
-import mysql.connector
+from db_connection import get_database_connection
 
 # Database connection
-db = mysql.connector.connect(
-    host="localhost",
-    user="spotify_user",
-    password="password",
-    database="spotify_db"
-)
+db = get_database_connection()
 cursor = db.cursor()
 
 # Create tables
@@ -24,11 +19,25 @@ cursor.execute("""
     );
 """)
 
-# Create Albums table with index on album_id
+# Raw chart artist strings -> normalized participant keys and their resolved MBIDs
+cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ArtistNameKeys (
+        raw_name VARCHAR(255) NOT NULL,
+        name_key VARCHAR(255) NOT NULL,
+        artist_id VARCHAR(255),
+        PRIMARY KEY (raw_name, name_key),
+        FOREIGN KEY (artist_id) REFERENCES Artists(artist_id),
+        INDEX (name_key),
+        INDEX (artist_id)
+    );
+""")
+
+# Create Albums table, upserted on the release group MBID in album_id
 cursor.execute("""
     CREATE TABLE IF NOT EXISTS Albums (
         no INT AUTO_INCREMENT PRIMARY KEY,
         album_id VARCHAR(255),
+        type VARCHAR(50),
         artist VARCHAR(255) NOT NULL,
         description VARCHAR(255),
         artist_id VARCHAR(255),
@@ -38,18 +47,23 @@ cursor.execute("""
         title VARCHAR(255) NOT NULL,
         year INT,
         FOREIGN KEY (artist_id) REFERENCES Artists(artist_id),
-        INDEX (album_id)
+        UNIQUE KEY (album_id),
+        INDEX (artist_id)
     );
 """)
 
-# Create Singles table
+# Create Singles table, upserted on the release group MBID in single_id
 cursor.execute("""
     CREATE TABLE IF NOT EXISTS Singles (
         no INT AUTO_INCREMENT PRIMARY KEY,
         single_id VARCHAR(255),
+        artist_id VARCHAR(255),
         title VARCHAR(255) NOT NULL,
-        year YEAR NOT NULL,
-        feature VARCHAR(255) NOT NULL
+        year YEAR,
+        feature VARCHAR(255) NOT NULL,
+        FOREIGN KEY (artist_id) REFERENCES Artists(artist_id),
+        UNIQUE KEY (single_id),
+        INDEX (artist_id)
     );
 """)
 
@@ -81,10 +95,12 @@ cursor.execute("""
         chart_id INT AUTO_INCREMENT PRIMARY KEY,
         artist_id VARCHAR(255),
         artist VARCHAR(255),
-        peak_listeners VARCHAR(255),
-        listeners VARCHAR(255),
-        peak_position VARCHAR(255),
-        FOREIGN KEY (artist_id) REFERENCES Artists(artist_id)
+        peak_listeners BIGINT,
+        listeners BIGINT,
+        peak_position INT,
+        FOREIGN KEY (artist_id) REFERENCES Artists(artist_id),
+        INDEX (listeners),
+        INDEX (peak_listeners)
     );
 """)
 
@@ -93,23 +109,55 @@ cursor.execute("""
         chart_id INT AUTO_INCREMENT PRIMARY KEY,
         artist_id VARCHAR(255),
         artist VARCHAR(255), 
-        streams VARCHAR(255),
-        daily VARCHAR(255),
-        as_lead VARCHAR(255),
-        solo VARCHAR(255),
-        as_feature VARCHAR(255),
-        FOREIGN KEY (artist_id) REFERENCES Artists(artist_id)
+        streams BIGINT,
+        daily BIGINT,
+        as_lead BIGINT,
+        solo BIGINT,
+        as_feature BIGINT,
+        FOREIGN KEY (artist_id) REFERENCES Artists(artist_id),
+        INDEX (streams),
+        INDEX (daily)
+    );
+""")
+
+# Delta-compressed history of the kworb lists, see snapshots.py
+cursor.execute("""
+    CREATE TABLE IF NOT EXISTS TopListenersHistory (
+        artist VARCHAR(255) NOT NULL,
+        snapshot_date DATE NOT NULL,
+        is_present BOOLEAN NOT NULL DEFAULT TRUE,
+        peak_listeners BIGINT,
+        listeners BIGINT,
+        peak_position INT,
+        PRIMARY KEY (artist, snapshot_date),
+        INDEX (snapshot_date)
+    );
+""")
+
+cursor.execute("""
+    CREATE TABLE IF NOT EXISTS TopArtistsHistory (
+        artist VARCHAR(255) NOT NULL,
+        snapshot_date DATE NOT NULL,
+        is_present BOOLEAN NOT NULL DEFAULT TRUE,
+        streams BIGINT,
+        daily BIGINT,
+        as_lead BIGINT,
+        solo BIGINT,
+        as_feature BIGINT,
+        PRIMARY KEY (artist, snapshot_date),
+        INDEX (snapshot_date)
     );
 """)
 
 cursor.execute("""
     CREATE TABLE IF NOT EXISTS TrackLists (
+        track_id INT AUTO_INCREMENT PRIMARY KEY,
         artist_id VARCHAR(255),
         album_id VARCHAR(255),
-        number VARCHAR(255),
+        number INT,
         title VARCHAR(255),
         variation_id VARCHAR(255),
-        length VARCHAR(255),
+        length_ms INT,
         detail VARCHAR(255),
         FOREIGN KEY (artist_id) REFERENCES Artists(artist_id),
         FOREIGN KEY (album_id) REFERENCES Albums(album_id),
@@ -118,6 +166,33 @@ cursor.execute("""
     );
 """)
 
+# Unified chart fact table, one row per (chart, date, position), range-partitioned by month.
+# Monthly partitions are split off pmax by chart_loader.ensure_chart_partitions.
+cursor.execute("""
+    CREATE TABLE IF NOT EXISTS chart_entries (
+        chart VARCHAR(64) NOT NULL,
+        chart_date DATE NOT NULL,
+        position INT NOT NULL,
+        position_change VARCHAR(10),
+        artist VARCHAR(255),
+        title VARCHAR(255),
+        days_on_chart INT,
+        weeks_on_chart INT,
+        peak_position INT,
+        x_count VARCHAR(10),
+        streams BIGINT,
+        streams_change BIGINT,
+        seven_day_streams BIGINT,
+        seven_day_change BIGINT,
+        total_streams BIGINT,
+        PRIMARY KEY (chart, chart_date, position),
+        INDEX (artist, title)
+    )
+    PARTITION BY RANGE COLUMNS (chart_date) (
+        PARTITION pmax VALUES LESS THAN (MAXVALUE)
+    );
+""")
+
 # Close the cursor and connection
 cursor.close()
 db.close()
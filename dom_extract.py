@@ -0,0 +1,110 @@
+import time
+
+# One execute_script per page: the whole structured payload comes back as JSON in a single
+# chromedriver round trip instead of a find_element/.text call per row, cell and field.
+# Sections that are absent from the page come back empty at once; only sections the page
+# fills in after load (the Wikipedia extract) are re-probed, briefly, while still pending.
+
+POLL_INTERVAL = 0.1
+# Longest wait for late sections before taking the payload as it is
+PROBE_TIMEOUT = 5
+
+# Shared helpers, prepended to every page script
+HELPERS = """
+const text = el => el ? el.innerText.trim() : null;
+const all = (selector, root) => Array.from((root || document).querySelectorAll(selector));
+const xpathAll = path => {
+    const result = document.evaluate(path, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    return Array.from({length: result.snapshotLength}, (_, i) => result.snapshotItem(i));
+};
+const nextSibling = (el, tag) => {
+    for (let node = el.nextElementSibling; node; node = node.nextElementSibling) {
+        if (node.tagName === tag) return node;
+    }
+    return null;
+};
+const pending = [];
+const wikipedia = () => {
+    const body = document.querySelector("div.wikipedia-extract-body");
+    // The extract is fetched after load into an empty placeholder
+    if (!body && document.querySelector("div.wikipedia-extract")) pending.push("wikipedia");
+    return text(body);
+};
+const tableRows = table => table ? all("tbody > tr", table).map(row => all("td", row)).filter(cells => cells.length) : [];
+"""
+
+ARTIST_PAGE_SCRIPT = HELPERS + """
+const properties = {};
+for (const dt of xpathAll("/html/body/div[2]/div[2]/dl/dt")) {
+    const label = dt.innerText.trim().replace(/:$/, "");
+    const dd = nextSibling(dt, "DD");
+    if (!dd || label.includes("ISNI code")) continue;
+    const links = all("a", dd);
+    properties[label] = links.length ? links.map(a => a.innerText) : dd.innerText;
+}
+// Each row links its release group, whose MBID becomes Albums.album_id
+const section = name => {
+    const h3 = all("h3").find(h => h.textContent.trim() === name);
+    return tableRows(h3 ? nextSibling(h3, "TABLE") : null).map(cells => {
+        const link = cells[1] && cells[1].querySelector("a[href*='/release-group/']");
+        return {
+            "Album ID": link ? link.getAttribute("href").split("/").pop() : null,
+            Type: name,
+            Year: text(cells[0]),
+            Title: text(cells[1]),
+            Artist: text(cells[2])
+        };
+    });
+};
+return {
+    wikipedia: wikipedia(),
+    genres: all("div#sidebar-tags a").map(a => a.innerText),
+    properties: properties,
+    albums: section("Album"),
+    singles: section("Single"),
+    pending: pending
+};
+"""
+
+RELEASE_GROUP_PAGE_SCRIPT = HELPERS + """
+const definition = label => {
+    const dt = all("dt").find(dt => dt.textContent.trim() === label);
+    return dt ? text(nextSibling(dt, "DD")) : null;
+};
+const releases = xpathAll("//table[contains(@class, 'tbl')]/tbody/tr")
+    .map(row => all("td", row))
+    .filter(cells => cells.length)
+    .map(cells => {
+        const link = all("a", cells[0])[1];
+        return {
+            "Variation ID": link ? link.getAttribute("href").split("/").pop() : null,
+            "Title": text(cells[0]),
+            "Artist": text(cells[1]),
+            "Format": text(cells[2]),
+            "Tracks": text(cells[3]),
+            "Country/Date": text(cells[4]),
+            "Label": text(cells[5])
+        };
+    });
+const cover = document.querySelector("div.cover-art img");
+return {
+    wikipedia: wikipedia(),
+    releases: releases,
+    image: cover ? cover.src : null,
+    artist: definition("Artist:"),
+    type: definition("Type:"),
+    genres: all("div#sidebar-tags div.genre-list a").map(a => a.innerText),
+    tags: all("div#sidebar-tag-list a").map(a => a.innerText),
+    pending: pending
+};
+"""
+
+
+# Run a page script, re-running it while any late section is still pending
+def extract(driver, script, timeout=PROBE_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while True:
+        payload = driver.execute_script(script)
+        if not payload.get("pending") or time.monotonic() >= deadline:
+            return payload
+        time.sleep(POLL_INTERVAL)
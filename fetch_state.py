@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+import requests
+from rate_limiter import lock_file, unlock_file
+
+logger = logging.getLogger(__name__)
+
+# Validators and content hashes of the last successful ingest, keyed by URL
+STATE_PATH = os.environ.get(
+    "FETCH_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fetch_state.json")
+)
+
+REQUEST_HEADERS = {"Accept-Encoding": "gzip, deflate"}
+
+# The standalone chart scripts and ingest_charts.py may update the state at the same time
+_state_lock = threading.Lock()
+
+# content is None whenever changed is False
+FetchResult = namedtuple("FetchResult", ["url", "content", "changed", "etag", "last_modified", "content_hash"])
+
+
+def load_fetch_state():
+    try:
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable fetch state {STATE_PATH}: {e}")
+        return {}
+
+
+# Hold the state's lock file for a load/update/save. The state file itself is replaced on
+# save, so the OS lock is taken on a separate file next to it.
+@contextmanager
+def locked_fetch_state():
+    with _state_lock, open(f"{STATE_PATH}.lock", "a+") as lock:
+        lock_file(lock)
+        try:
+            yield
+        finally:
+            unlock_file(lock)
+
+
+# Write through a temporary file of our own, so a concurrent writer never sees it half written
+def save_fetch_state(state):
+    directory, name = os.path.split(os.path.abspath(STATE_PATH))
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, prefix=f"{name}.", suffix=".tmp",
+                                     delete=False) as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    try:
+        os.replace(f.name, STATE_PATH)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+
+# Request headers that make the server answer 304 when nothing changed
+def conditional_headers(entry):
+    headers = dict(REQUEST_HEADERS)
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+# Build a FetchResult from a response status/body, comparing against the stored hash
+def fetch_result(url, entry, status, content, etag, last_modified):
+    if status == 304:
+        logger.info(f"{url} not modified since last ingest")
+        return FetchResult(url, None, False, entry.get("etag"), entry.get("last_modified"), entry.get("content_hash"))
+
+    content_hash = hashlib.sha256(content).hexdigest()
+    if content_hash == entry.get("content_hash"):
+        logger.info(f"{url} content unchanged since last ingest")
+        return FetchResult(url, None, False, etag, last_modified, content_hash)
+    return FetchResult(url, content, True, etag, last_modified, content_hash)
+
+
+# Fetch url with conditional headers; returns a FetchResult or None on error
+def fetch_if_changed(url, session=None):
+    entry = load_fetch_state().get(url, {})
+    try:
+        response = (session or requests).get(url, headers=conditional_headers(entry), timeout=30)
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.RequestException as e:
+        logger.error(f"Error fetching data from {url}: {e}")
+        return None
+
+    return fetch_result(
+        url, entry, response.status_code, response.content,
+        response.headers.get("ETag"), response.headers.get("Last-Modified")
+    )
+
+
+# Persist validators once the fetched page has been stored successfully
+def remember_fetch(result):
+    with locked_fetch_state():
+        state = load_fetch_state()
+        state[result.url] = {
+            "etag": result.etag,
+            "last_modified": result.last_modified,
+            "content_hash": result.content_hash,
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        save_fetch_state(state)
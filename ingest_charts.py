@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+import aiohttp
+from utils import create_database_connection, parse_chart_table
+from fetch_state import load_fetch_state, conditional_headers, fetch_result, remember_fetch
+from chart_frame import to_chart_frame
+from chart_loader import load_chart_frame, weekly_chart_date
+from top_artists import store_top_artists
+from top_listeners import store_top_listeners
+from logging_config import setup_logging
+
+# Fetch every kworb source concurrently over one keep-alive session, parse pages in a
+# process pool and hand each parsed frame to a single database writer as soon as it is ready.
+#
+#   KWORB_COUNTRIES=us,gb,de python ingest_charts.py --cadence daily
+#   python ingest_charts.py --cadence weekly --countries us,gb,de,br --concurrency 16
+#
+# Each source keeps its own cadence: daily charts every day, weekly charts once a week
+# (stored under their chart Thursday) and the artists/listeners lists every 14 days.
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+KWORB_BASE = "https://kworb.net/spotify"
+
+# kind is "chart" (stored in chart_entries under name), "artists" or "listeners";
+# cadence is how often the scheduler ingests it, one of CADENCES
+Source = namedtuple("Source", ["name", "url", "kind", "cadence"])
+
+CADENCES = ("daily", "weekly", "fortnightly")
+
+GLOBAL_SOURCES = [
+    Source("global_daily", f"{KWORB_BASE}/country/global_daily.html", "chart", "daily"),
+    Source("global_weekly", f"{KWORB_BASE}/country/global_weekly.html", "chart", "weekly"),
+    Source("artists", f"{KWORB_BASE}/artists.html", "artists", "fortnightly"),
+    Source("listeners", f"{KWORB_BASE}/listeners.html", "listeners", "fortnightly"),
+]
+
+# Comma separated kworb country codes, e.g. "us,gb,de,br"
+COUNTRIES = os.environ.get("KWORB_COUNTRIES", "")
+
+MAX_CONCURRENCY = 16
+# Politeness towards a single host: requests in flight and seconds between request starts
+PER_HOST_CONCURRENCY = 4
+PER_HOST_INTERVAL = 0.25
+
+REQUEST_TIMEOUT = 60
+USER_AGENT = "music_data chart ingestion (+https://kworb.net)"
+
+
+def parse_countries(value):
+    return [code.strip().lower() for code in value.split(",") if code.strip()]
+
+
+def build_sources(countries, cadences=CADENCES):
+    sources = list(GLOBAL_SOURCES)
+    for code in countries:
+        for period in ("daily", "weekly"):
+            sources.append(Source(f"{code}_{period}", f"{KWORB_BASE}/country/{code}_{period}.html", "chart", period))
+    return [source for source in sources if source.cadence in cadences]
+
+
+# Weekly charts are dated by the Thursday ending their chart week, everything else by today
+def source_date(source, today):
+    if source.cadence == "weekly":
+        return weekly_chart_date(today)
+    return today
+
+
+# Limits concurrent requests per host and spaces out their start times
+class HostPoliteness:
+    def __init__(self, concurrency=PER_HOST_CONCURRENCY, interval=PER_HOST_INTERVAL):
+        self.concurrency = concurrency
+        self.interval = interval
+        self.hosts = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = [asyncio.Semaphore(self.concurrency), asyncio.Lock(), 0.0]
+        semaphore, lock, _ = self.hosts[host]
+        async with semaphore:
+            async with lock:
+                wait = self.hosts[host][2] + self.interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self.hosts[host][2] = time.monotonic()
+            yield
+
+
+async def fetch_source(session, source, state, politeness):
+    entry = state.get(source.url, {})
+    try:
+        async with politeness.slot(source.url):
+            async with session.get(source.url, headers=conditional_headers(entry)) as response:
+                if response.status != 304:
+                    response.raise_for_status()
+                content = await response.read()
+                return fetch_result(
+                    source.url, entry, response.status, content,
+                    response.headers.get("ETag"), response.headers.get("Last-Modified")
+                )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Error fetching {source.url}: {e!r}")
+        return None
+
+
+# Runs in the parse pool
+def parse_frame(content):
+    headers, rows = parse_chart_table(content)
+    if headers is None:
+        return None
+    return to_chart_frame(headers, rows)
+
+
+# Runs on the single database writer thread
+def store_source(conn, source, frame, today):
+    if source.kind == "chart":
+        return load_chart_frame(conn, source.name, source_date(source, today), frame) > 0
+    if source.kind == "artists":
+        return store_top_artists(conn, frame, today)
+    if source.kind == "listeners":
+        return store_top_listeners(conn, frame, today)
+    raise ValueError(f"Unknown source kind {source.kind}")
+
+
+async def ingest_source(session, source, state, politeness, parse_pool, db_pool, conn, today):
+    loop = asyncio.get_running_loop()
+    result = await fetch_source(session, source, state, politeness)
+    if result is None:
+        return "failed"
+    if not result.changed:
+        return "unchanged"
+
+    frame = await loop.run_in_executor(parse_pool, parse_frame, result.content)
+    if frame is None or frame.empty:
+        logger.error(f"No chart rows parsed from {source.url}")
+        return "failed"
+
+    stored = await loop.run_in_executor(db_pool, store_source, conn, source, frame, today)
+    if not stored:
+        return "failed"
+    await loop.run_in_executor(db_pool, remember_fetch, result)
+    logger.info(f"Stored {len(frame)} rows from {source.name}")
+    return "loaded"
+
+
+async def ingest(sources, conn, concurrency=MAX_CONCURRENCY, per_host=PER_HOST_CONCURRENCY, interval=PER_HOST_INTERVAL):
+    today = datetime.now().date()
+    state = load_fetch_state()
+    politeness = HostPoliteness(per_host, interval)
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+
+    # The connection is only ever used from the one writer thread
+    with ProcessPoolExecutor() as parse_pool, ThreadPoolExecutor(max_workers=1) as db_pool:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers={"User-Agent": USER_AGENT}) as session:
+            tasks = [
+                ingest_source(session, source, state, politeness, parse_pool, db_pool, conn, today)
+                for source in sources
+            ]
+            return await asyncio.gather(*tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest all kworb chart sources concurrently")
+    parser.add_argument("--cadence", action="append", choices=CADENCES, help="Only ingest sources of this cadence (repeatable, default: all)")
+    parser.add_argument("--countries", default=COUNTRIES, help="Comma separated kworb country codes")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY, help="Maximum requests in flight")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_CONCURRENCY, help="Maximum requests in flight per host")
+    parser.add_argument("--interval", type=float, default=PER_HOST_INTERVAL, help="Seconds between request starts per host")
+    args = parser.parse_args()
+
+    sources = build_sources(parse_countries(args.countries), args.cadence or CADENCES)
+
+    conn, cursor = create_database_connection()
+    if not conn or not cursor:
+        logger.error("Database connection failed")
+        return
+
+    started = time.perf_counter()
+    try:
+        outcomes = asyncio.run(ingest(sources, conn, args.concurrency, args.per_host, args.interval))
+    finally:
+        cursor.close()
+        conn.close()
+
+    summary = {outcome: outcomes.count(outcome) for outcome in ("loaded", "unchanged", "failed")}
+    logger.info(f"Ingested {len(sources)} sources in {time.perf_counter() - started:.1f}s: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import logging
+import re
+from datetime import datetime
+import mysql.connector
+from utils import create_database_connection
+from chart_loader import CHART_ENTRIES_TABLE, ensure_chart_partitions, weekly_chart_date
+from logging_config import setup_logging
+
+# One-shot migration of the legacy per-run SpotifyTopChart_YYYYMMDD / SpotifyWeekly_YYYYMMDD
+# tables into chart_entries. Each table is copied server-side with a single INSERT ... SELECT.
+# Re-running is safe: a table's (chart, date) slice is replaced, not appended.
+# SpotifyWeekly tables are named by the day weekly.py ran; they are filed under the Thursday
+# ending their chart week, as ingest_charts.py files global_weekly now.
+
+setup_logging()
+
+LEGACY_TABLE_PATTERN = re.compile(r"spotify(topchart|weekly)_(\d{8})", re.IGNORECASE)
+
+# Legacy table kind -> (chart name, SELECT list matching chart_entries columns after chart/chart_date)
+LEGACY_CHARTS = {
+    "topchart": ("global_daily", """
+        t.position, t.position_change, t.artist, t.title, t.days_on_chart, NULL, t.peak_position, NULL,
+        t.streams, t.streams_change, t.seven_day_streams, t.seven_day_change, t.total_streams
+    """),
+    "weekly": ("global_weekly", """
+        t.position, t.position_change, t.artist, t.title, NULL, t.weeks_on_chart, t.peak_position, t.x_count,
+        t.streams, t.streams_change, NULL, NULL, t.total_streams
+    """),
+}
+
+INSERT_COLUMNS = """
+    chart, chart_date, position, position_change, artist, title, days_on_chart, weeks_on_chart,
+    peak_position, x_count, streams, streams_change, seven_day_streams, seven_day_change, total_streams
+"""
+
+
+# Legacy chart tables in the current database as (table name, chart, chart date, select list),
+# oldest first; of two weekly tables for the same week the later run is copied last and wins
+def find_legacy_tables(cursor):
+    cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()")
+    tables = []
+    for (table_name,) in cursor.fetchall():
+        match = LEGACY_TABLE_PATTERN.fullmatch(table_name)
+        if match:
+            chart, select_list = LEGACY_CHARTS[match.group(1).lower()]
+            chart_date = datetime.strptime(match.group(2), "%Y%m%d").date()
+            if chart == "global_weekly":
+                chart_date = weekly_chart_date(chart_date)
+            tables.append((table_name, chart, chart_date, select_list))
+    return sorted(tables, key=lambda table: (table[2], table[0].lower()))
+
+
+# Copy one legacy table; when a position was inserted more than once the latest row wins
+def migrate_table(conn, cursor, table_name, chart, chart_date, select_list):
+    try:
+        cursor.execute(
+            f"DELETE FROM {CHART_ENTRIES_TABLE} WHERE chart = %s AND chart_date = %s",
+            (chart, chart_date)
+        )
+        cursor.execute(f"""
+            INSERT INTO {CHART_ENTRIES_TABLE} ({INSERT_COLUMNS})
+            SELECT %s, %s, {select_list}
+            FROM {table_name} t
+            JOIN (
+                SELECT MAX(chart_id) AS chart_id FROM {table_name}
+                WHERE position IS NOT NULL
+                GROUP BY position
+            ) latest ON latest.chart_id = t.chart_id
+        """, (chart, chart_date))
+        copied = cursor.rowcount
+        conn.commit()
+        logging.info(f"Migrated {copied} rows from {table_name} into {chart} {chart_date}")
+        return copied
+    except mysql.connector.Error as err:
+        conn.rollback()
+        logging.error(f"Error migrating {table_name}: {err}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold per-day chart tables into chart_entries")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the tables that would be migrated")
+    parser.add_argument("--drop", action="store_true", help="Drop each legacy table after it was copied")
+    args = parser.parse_args()
+
+    conn, cursor = create_database_connection()
+    if not conn or not cursor:
+        logging.error("Database connection failed")
+        return
+
+    try:
+        tables = find_legacy_tables(cursor)
+        logging.info(f"Found {len(tables)} legacy chart tables")
+        if args.dry_run or not tables:
+            for table_name, chart, chart_date, _ in tables:
+                logging.info(f"{table_name} -> {chart} {chart_date}")
+            return
+
+        # Create all monthly partitions up front, oldest first, before any data is copied
+        ensure_chart_partitions(cursor, tables[0][2], tables[-1][2])
+
+        total = 0
+        for table_name, chart, chart_date, select_list in tables:
+            copied = migrate_table(conn, cursor, table_name, chart, chart_date, select_list)
+            if copied is None:
+                continue
+            total += copied
+            if args.drop:
+                cursor.execute(f"DROP TABLE {table_name}")
+                logging.info(f"Dropped {table_name}")
+        logging.info(f"Migrated {total} rows from {len(tables)} tables")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import logging
+import mysql.connector
+from utils import create_database_connection
+from logging_config import setup_logging
+
+# Gives Albums and Singles the unique MBID keys crawlArtistInfo upserts on:
+#   1. add Albums.type and the artist_id column Singles lacks, and let Singles.year be NULL
+#      for undated singles
+#   2. delete rows repeating an MBID, keeping the first one inserted (lowest no)
+#   3. add the unique key on the MBID column and an index on artist_id
+# Each step checks the current schema, so an interrupted run can simply be restarted.
+
+setup_logging()
+
+# table -> (MBID column, [(column, definition) to add], [(column, type) to make nullable])
+MIGRATIONS = {
+    "Albums": ("album_id", [("type", "VARCHAR(50)")], []),
+    "Singles": ("single_id", [("artist_id", "VARCHAR(255)")], [("year", "YEAR")]),
+}
+
+
+def column_types(cursor, table_name):
+    cursor.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table_name,))
+    return {name.lower(): data_type.lower() for name, data_type in cursor.fetchall()}
+
+
+def not_null_columns(cursor, table_name):
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND is_nullable = 'NO'
+    """, (table_name,))
+    return {row[0].lower() for row in cursor.fetchall()}
+
+
+# Single-column indexes on a table: column -> [(index name, unique)]
+def single_column_indexes(cursor, table_name):
+    cursor.execute("""
+        SELECT index_name, MAX(column_name), MIN(non_unique) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        GROUP BY index_name HAVING COUNT(*) = 1
+    """, (table_name,))
+    indexes = {}
+    for index_name, column, non_unique in cursor.fetchall():
+        indexes.setdefault(column.lower(), []).append((index_name, not non_unique))
+    return indexes
+
+
+def has_foreign_key(cursor, table_name, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.key_column_usage
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+            AND referenced_table_name IS NOT NULL
+    """, (table_name, column))
+    return cursor.fetchone()[0] > 0
+
+
+def remove_duplicates(conn, cursor, table_name, key_column):
+    # Other tables reference the MBID value, which the kept row still holds
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+    try:
+        cursor.execute(f"""
+            DELETE duplicate FROM {table_name} duplicate
+            JOIN {table_name} kept ON duplicate.{key_column} = kept.{key_column} AND duplicate.no > kept.no
+        """)
+        removed = cursor.rowcount
+        conn.commit()
+    finally:
+        cursor.execute("SET SESSION foreign_key_checks = 1")
+    return removed
+
+
+def migrate_table(conn, table_name, key_column, added_columns, nullable_columns):
+    cursor = conn.cursor()
+    try:
+        types = column_types(cursor, table_name)
+        if not types:
+            logging.warning(f"Table {table_name} does not exist, skipping")
+            return
+
+        for column, definition in added_columns:
+            if column not in types:
+                cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} {definition}")
+                logging.info(f"{table_name}: added {column}")
+        not_null = not_null_columns(cursor, table_name)
+        for column, column_type in nullable_columns:
+            if column in not_null:
+                cursor.execute(f"ALTER TABLE {table_name} MODIFY COLUMN {column} {column_type} NULL")
+                logging.info(f"{table_name}: {column} may now be NULL")
+
+        indexes = single_column_indexes(cursor, table_name)
+        if not any(unique for _, unique in indexes.get(key_column, [])):
+            removed = remove_duplicates(conn, cursor, table_name, key_column)
+            logging.info(f"{table_name}: removed {removed} rows repeating a {key_column}")
+            cursor.execute(f"ALTER TABLE {table_name} ADD UNIQUE KEY uq_{key_column} ({key_column})")
+            logging.info(f"{table_name}: added unique key on {key_column}")
+            # The unique key now serves lookups and foreign keys on the column
+            for index_name, _ in indexes.get(key_column, []):
+                cursor.execute(f"ALTER TABLE {table_name} DROP INDEX `{index_name}`")
+        else:
+            logging.info(f"{table_name}: {key_column} already unique")
+
+        if "artist_id" not in indexes:
+            cursor.execute(f"ALTER TABLE {table_name} ADD INDEX (artist_id)")
+            logging.info(f"{table_name}: added index on artist_id")
+        if not has_foreign_key(cursor, table_name, "artist_id"):
+            cursor.execute(f"ALTER TABLE {table_name} ADD FOREIGN KEY (artist_id) REFERENCES Artists(artist_id)")
+            logging.info(f"{table_name}: added foreign key on artist_id")
+    except mysql.connector.Error as err:
+        conn.rollback()
+        logging.error(f"Error migrating {table_name}: {err}")
+    finally:
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add unique MBID keys to Albums and Singles")
+    parser.add_argument("tables", nargs="*", default=list(MIGRATIONS), help="Tables to migrate (default: all)")
+    args = parser.parse_args()
+
+    conn, cursor = create_database_connection()
+    if not conn or not cursor:
+        logging.error("Database connection failed")
+        return
+
+    try:
+        for table_name in args.tables:
+            key_column, added_columns, nullable_columns = MIGRATIONS[table_name]
+            migrate_table(conn, table_name, key_column, added_columns, nullable_columns)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
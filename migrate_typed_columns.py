@@ -0,0 +1,310 @@
+import argparse
+import logging
+import time
+import mysql.connector
+from utils import create_database_connection, parse_int, parse_duration_ms, parse_track_number
+from logging_config import setup_logging
+
+# Online migration of string-typed numeric columns to BIGINT/INT:
+#   1. add a <column>_typed column next to each string column, and triggers that log the
+#      primary key of every row inserted or whose source columns change into <table>_typed_changes
+#   2. backfill the _typed columns in primary-key batches, one short transaction per batch
+#   3. re-convert logged rows until the log is nearly empty
+#   4. under a write lock: drain the log, check that no value was lost in conversion and
+#      swap the columns with one ALTER TABLE
+# TrackLists.number values that are not numbers (vinyl positions such as "A1") move into the
+# detail JSON as "Position", where the crawlers store them, instead of being lost.
+# Each step checks the current schema, so an interrupted run can simply be restarted.
+# Creating the triggers needs the TRIGGER privilege (and SUPER with binary logging on
+# unless log_bin_trust_function_creators is set).
+
+setup_logging()
+
+BATCH_SIZE = 5000
+# Pause between batches to leave room for concurrent writers
+BATCH_PAUSE = 0.05
+# Take the write lock once the change log is down to this many rows
+LOCK_THRESHOLD = 1000
+# Source values that mean "no value" and may become NULL
+BLANK_VALUES = ("", "-", "?:??")
+
+# table -> (primary key, [(source column, target column, target type, converter)], leaderboard indexes)
+MIGRATIONS = {
+    "TopArtists": ("chart_id", [
+        ("streams", "streams", "BIGINT", parse_int),
+        ("daily", "daily", "BIGINT", parse_int),
+        ("as_lead", "as_lead", "BIGINT", parse_int),
+        ("solo", "solo", "BIGINT", parse_int),
+        ("as_feature", "as_feature", "BIGINT", parse_int),
+    ], ["streams", "daily"]),
+    "TopListeners": ("chart_id", [
+        ("peak_listeners", "peak_listeners", "BIGINT", parse_int),
+        ("listeners", "listeners", "BIGINT", parse_int),
+        ("peak_position", "peak_position", "INT", parse_int),
+    ], ["listeners", "peak_listeners"]),
+    "TrackLists": ("track_id", [
+        ("number", "number", "INT", parse_track_number),
+        ("length", "length_ms", "INT", parse_duration_ms),
+    ], []),
+}
+
+# table -> {source column: (JSON column, path)} for values that do not convert but are kept
+KEPT_IN_JSON = {
+    "TrackLists": {"number": ("detail", "$.Position")},
+}
+
+INTEGER_TYPES = ("int", "bigint")
+
+
+def column_types(cursor, table_name):
+    cursor.execute("""
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table_name,))
+    return {name.lower(): data_type.lower() for name, data_type in cursor.fetchall()}
+
+
+def index_columns(cursor, table_name):
+    cursor.execute("""
+        SELECT column_name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND seq_in_index = 1
+    """, (table_name,))
+    return {row[0].lower() for row in cursor.fetchall()}
+
+
+def is_blank(value):
+    return value is None or str(value).strip() in BLANK_VALUES
+
+
+def convert_rows(cursor, table_name, primary_key, columns, rows):
+    assignments = ", ".join(f"{source}_typed = %s" for source, _, _, _ in columns)
+    cursor.executemany(f"UPDATE {table_name} SET {assignments} WHERE {primary_key} = %s", [
+        tuple(convert(value) for (_, _, _, convert), value in zip(columns, row[1:])) + (row[0],)
+        for row in rows
+    ])
+    keep_unconverted(cursor, table_name, primary_key, columns, rows)
+
+
+# Write values that did not convert into their JSON column; a JSON column holding
+# something that is not JSON is left alone, and lost_values reports the row
+def keep_unconverted(cursor, table_name, primary_key, columns, rows):
+    kept = KEPT_IN_JSON.get(table_name, {})
+    for index, (source, _, _, convert) in enumerate(columns, start=1):
+        if source not in kept:
+            continue
+        json_column, path = kept[source]
+        values = [
+            (str(row[index]).strip(), row[0]) for row in rows
+            if not is_blank(row[index]) and convert(row[index]) is None
+        ]
+        if values:
+            cursor.executemany(f"""
+                UPDATE {table_name}
+                SET {json_column} = JSON_SET(COALESCE(NULLIF({json_column}, ''), '{{}}'), '{path}', %s)
+                WHERE {primary_key} = %s
+                    AND ({json_column} IS NULL OR {json_column} = '' OR JSON_VALID({json_column}))
+            """, values)
+
+
+# Copy converted values into the _typed columns for every row, in primary key order
+def backfill(conn, cursor, table_name, primary_key, columns):
+    sources = ", ".join(source for source, _, _, _ in columns)
+    after_key = 0
+    copied = 0
+    while True:
+        cursor.execute(f"""
+            SELECT {primary_key}, {sources} FROM {table_name}
+            WHERE {primary_key} > %s ORDER BY {primary_key} LIMIT %s
+        """, (after_key, BATCH_SIZE))
+        rows = cursor.fetchall()
+        if not rows:
+            return copied
+        convert_rows(cursor, table_name, primary_key, columns, rows)
+        conn.commit()
+        after_key = rows[-1][0]
+        copied += len(rows)
+        logging.info(f"{table_name}: backfilled {copied} rows (up to {primary_key} {after_key})")
+        time.sleep(BATCH_PAUSE)
+
+
+def changes_table(table_name):
+    return f"{table_name}_typed_changes"
+
+
+# Log rows written during the migration; updates only when a source column changes, so
+# the backfill's own writes to the _typed columns are not logged
+def create_change_log(cursor, table_name, primary_key, columns):
+    changes = changes_table(table_name)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {changes} ({primary_key} BIGINT PRIMARY KEY)")
+    unchanged = " AND ".join(f"NEW.{source} <=> OLD.{source}" for source, _, _, _ in columns)
+    drop_change_log_triggers(cursor, table_name)
+    cursor.execute(f"""
+        CREATE TRIGGER {table_name}_typed_insert AFTER INSERT ON {table_name} FOR EACH ROW
+        INSERT IGNORE INTO {changes} ({primary_key}) VALUES (NEW.{primary_key})
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER {table_name}_typed_update AFTER UPDATE ON {table_name} FOR EACH ROW
+        INSERT IGNORE INTO {changes} ({primary_key}) SELECT NEW.{primary_key} FROM DUAL WHERE NOT ({unchanged})
+    """)
+
+
+def drop_change_log_triggers(cursor, table_name):
+    cursor.execute(f"DROP TRIGGER IF EXISTS {table_name}_typed_insert")
+    cursor.execute(f"DROP TRIGGER IF EXISTS {table_name}_typed_update")
+
+
+def drop_change_log(cursor, table_name):
+    drop_change_log_triggers(cursor, table_name)
+    cursor.execute(f"DROP TABLE IF EXISTS {changes_table(table_name)}")
+
+
+# Re-convert logged rows. A key leaves the log before its row is read, so a write racing
+# the conversion logs it again for the next round. Returns the rows left in the log.
+def drain_change_log(conn, cursor, table_name, primary_key, columns, threshold=0):
+    changes = changes_table(table_name)
+    sources = ", ".join(source for source, _, _, _ in columns)
+    while True:
+        cursor.execute(f"SELECT {primary_key} FROM {changes} LIMIT %s", (BATCH_SIZE,))
+        keys = [row[0] for row in cursor.fetchall()]
+        if len(keys) <= threshold or not keys:
+            return len(keys)
+        placeholders = ", ".join(["%s"] * len(keys))
+        cursor.execute(f"DELETE FROM {changes} WHERE {primary_key} IN ({placeholders})", keys)
+        conn.commit()
+        cursor.execute(f"SELECT {primary_key}, {sources} FROM {table_name} WHERE {primary_key} IN ({placeholders})", keys)
+        convert_rows(cursor, table_name, primary_key, columns, cursor.fetchall())
+        conn.commit()
+        logging.info(f"{table_name}: re-converted {len(keys)} rows changed during the migration")
+
+
+# Source values that are present but did not convert and were not kept, per column
+def lost_values(cursor, table_name, columns):
+    blanks = ", ".join(["%s"] * len(BLANK_VALUES))
+    kept = KEPT_IN_JSON.get(table_name, {})
+    lost = {}
+    for source, _, _, _ in columns:
+        not_kept = ""
+        if source in kept:
+            json_column, path = kept[source]
+            not_kept = (f"AND NOT (JSON_VALID({json_column}) AND "
+                        f"JSON_UNQUOTE(JSON_EXTRACT({json_column}, '{path}')) <=> TRIM({source}))")
+        cursor.execute(f"""
+            SELECT COUNT(*), MIN({source}), MAX({source}) FROM {table_name}
+            WHERE {source} IS NOT NULL AND TRIM({source}) NOT IN ({blanks}) AND {source}_typed IS NULL
+                {not_kept}
+        """, BLANK_VALUES)
+        count, low, high = cursor.fetchone()
+        if count:
+            lost[source] = (count, low, high)
+    return lost
+
+
+def migrate_table(conn, table_name, primary_key, columns, leaderboard_indexes, force=False, add_primary_key=False):
+    cursor = conn.cursor()
+    locked = False
+    try:
+        types = column_types(cursor, table_name)
+        if not types:
+            logging.warning(f"Table {table_name} does not exist, skipping")
+            return
+
+        # TrackLists has no key to batch on. Adding an AUTO_INCREMENT column rebuilds the
+        # table and blocks writes for the whole rebuild, so it only happens when asked for.
+        if primary_key not in types:
+            if not add_primary_key:
+                logging.error(f"{table_name} has no {primary_key} to migrate in batches; rerun with "
+                              f"--add-primary-key during a maintenance window (writes block while it is added)")
+                return
+            logging.info(f"Adding {primary_key} primary key to {table_name}, writes are blocked meanwhile")
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {primary_key} INT AUTO_INCREMENT PRIMARY KEY FIRST")
+            types = column_types(cursor, table_name)
+
+        pending = [
+            column for column in columns
+            if column[0] in types and types[column[0]] not in INTEGER_TYPES
+        ]
+        if pending:
+            for source, _, target_type, _ in pending:
+                if f"{source}_typed" not in types:
+                    cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {source}_typed {target_type}")
+            create_change_log(cursor, table_name, primary_key, pending)
+
+            copied = backfill(conn, cursor, table_name, primary_key, pending)
+            drain_change_log(conn, cursor, table_name, primary_key, pending, LOCK_THRESHOLD)
+
+            # Writers wait from here to the swap; only the last few logged rows are left
+            cursor.execute(f"LOCK TABLES {table_name} WRITE, {changes_table(table_name)} WRITE")
+            locked = True
+            drain_change_log(conn, cursor, table_name, primary_key, pending)
+
+            lost = lost_values(cursor, table_name, pending)
+            for source, (count, low, high) in lost.items():
+                logging.error(f"{table_name}.{source}: {count} values did not convert (e.g. {low!r} .. {high!r})")
+            if lost and not force:
+                cursor.execute("UNLOCK TABLES")
+                locked = False
+                drop_change_log(cursor, table_name)
+                logging.error(f"{table_name}: not swapping columns, the values above would be lost; "
+                              f"fix them or rerun with --force to store them as NULL")
+                return
+
+            drop_change_log_triggers(cursor, table_name)
+            swaps = ", ".join(
+                f"DROP COLUMN {source}, RENAME COLUMN {source}_typed TO {target}"
+                for source, target, _, _ in pending
+            )
+            cursor.execute(f"ALTER TABLE {table_name} {swaps}")
+            cursor.execute("UNLOCK TABLES")
+            locked = False
+            drop_change_log(cursor, table_name)
+            logging.info(f"{table_name}: converted {', '.join(target for _, target, _, _ in pending)} "
+                         f"({copied} rows)")
+        else:
+            logging.info(f"{table_name}: columns already typed")
+
+        indexed = index_columns(cursor, table_name)
+        for column in leaderboard_indexes:
+            if column not in indexed:
+                cursor.execute(f"ALTER TABLE {table_name} ADD INDEX ({column})")
+                logging.info(f"{table_name}: added index on {column}")
+    except mysql.connector.Error as err:
+        conn.rollback()
+        logging.error(f"Error migrating {table_name}: {err}")
+        if locked:
+            cursor.execute("UNLOCK TABLES")
+            locked = False
+        # Stop logging writes; a rerun starts over with a full backfill
+        try:
+            drop_change_log(cursor, table_name)
+        except mysql.connector.Error as drop_err:
+            logging.warning(f"Could not remove the {table_name} change log: {drop_err}")
+    finally:
+        if locked:
+            cursor.execute("UNLOCK TABLES")
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert string numeric columns to typed columns")
+    parser.add_argument("tables", nargs="*", default=list(MIGRATIONS), help="Tables to migrate (default: all)")
+    parser.add_argument("--force", action="store_true", help="Swap even if some values did not convert (they become NULL)")
+    parser.add_argument("--add-primary-key", action="store_true",
+                        help="Add a missing batching key; rebuilds the table and blocks writes meanwhile")
+    args = parser.parse_args()
+
+    conn, cursor = create_database_connection()
+    if not conn or not cursor:
+        logging.error("Database connection failed")
+        return
+
+    try:
+        for table_name in args.tables:
+            primary_key, columns, leaderboard_indexes = MIGRATIONS[table_name]
+            migrate_table(conn, table_name, primary_key, columns, leaderboard_indexes, args.force, args.add_primary_key)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
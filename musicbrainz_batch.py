@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from name_normalization import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Resolve many names with one MusicBrainz search each batch: the per-item clauses are
+# OR-combined into a single Lucene query returning up to 100 hits, and the hits are
+# matched back to the inputs locally on normalized names, best score first. Items
+# without a matching hit are returned unmatched so the caller can fall back to its
+# one-query-per-item lookup.
+
+# The search API caps a page at 100 results
+HIT_LIMIT = 100
+ARTIST_BATCH_SIZE = 20
+RELEASE_GROUP_BATCH_SIZE = 10
+# Keep the encoded query well inside URL length limits
+MAX_QUERY_LENGTH = 1500
+
+
+# field:"value" with the characters that are special inside a Lucene phrase escaped
+def phrase(field, value):
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'{field}:"{escaped}"'
+
+
+def artist_clause(name):
+    return phrase("artist", name)
+
+
+def artist_key(name):
+    return normalize_name(name)
+
+
+# An artist hit matches on its name or any alias
+def artist_hit_keys(hit):
+    keys = {normalize_name(hit.get("name"))}
+    keys.update(normalize_name(alias.get("name")) for alias in hit.get("aliases") or [])
+    return keys
+
+
+def release_group_clause(item):
+    artist_name, album_name = item
+    return f"({phrase('artist', artist_name)} AND {phrase('releasegroup', album_name)})"
+
+
+def release_group_key(item):
+    artist_name, album_name = item
+    return normalize_name(artist_name), normalize_name(album_name)
+
+
+# A release group hit matches on its title with the full credit or any credited artist
+def release_group_hit_keys(hit):
+    title = normalize_name(hit.get("title"))
+    credits = hit.get("artist-credit") or []
+    names = {"".join(credit.get("name", "") + credit.get("joinphrase", "") for credit in credits)}
+    for credit in credits:
+        names.add(credit.get("name"))
+        names.add((credit.get("artist") or {}).get("name"))
+    return {(normalize_name(name), title) for name in names if name}
+
+
+# Split items into batches of at most batch_size clauses and MAX_QUERY_LENGTH characters
+def query_batches(items, clause, batch_size):
+    batch, length = [], 0
+    for item in items:
+        size = len(clause(item)) + 4
+        if batch and (len(batch) >= batch_size or length + size > MAX_QUERY_LENGTH):
+            yield batch
+            batch, length = [], 0
+        batch.append(item)
+        length += size
+    if batch:
+        yield batch
+
+
+async def search_batch(client, entity, batch, clause, item_key, hit_keys):
+    data = await client.search(entity, " OR ".join(clause(item) for item in batch), limit=HIT_LIMIT)
+    if data is None:
+        return {}
+    hits = sorted(data.get(f"{entity}s") or [], key=lambda hit: hit.get("score", 0), reverse=True)
+    best = {}
+    for hit in hits:
+        for key in hit_keys(hit):
+            best.setdefault(key, hit)
+    matched = {}
+    for item in batch:
+        hit = best.get(item_key(item))
+        if hit is not None:
+            matched[item] = hit
+    return matched
+
+
+# Returns {item: best matching hit} for the items a batch query could match
+async def search_batched(client, entity, items, clause, item_key, hit_keys, batch_size):
+    items = list(dict.fromkeys(items))
+    if not items:
+        return {}
+    batches = list(query_batches(items, clause, batch_size))
+    results = await asyncio.gather(*(
+        search_batch(client, entity, batch, clause, item_key, hit_keys) for batch in batches
+    ))
+    matched = {}
+    for result in results:
+        matched.update(result)
+    logger.info(f"Batched {entity} search: {len(matched)}/{len(items)} matched in {len(batches)} queries")
+    return matched
+
+
+async def search_artists(client, artist_names):
+    return await search_batched(
+        client, "artist", artist_names, artist_clause, artist_key, artist_hit_keys, ARTIST_BATCH_SIZE
+    )
+
+
+# items are (artist name, album name) pairs
+async def search_release_groups(client, items):
+    return await search_batched(
+        client, "release-group", items, release_group_clause, release_group_key,
+        release_group_hit_keys, RELEASE_GROUP_BATCH_SIZE
+    )
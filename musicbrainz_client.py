@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import aiohttp
+from rate_limiter import musicbrainz_limiter
+
+logger = logging.getLogger(__name__)
+
+# Async client for the MusicBrainz ws/2 JSON API. One keep-alive session serves every
+# lookup, so a query costs a server round trip instead of a fresh TCP+TLS handshake, and
+# hundreds of pending lookups are coroutines rather than threads. Requests still go out
+# at the pace musicbrainz_limiter allows for the whole machine.
+#
+#   async with MusicBrainzClient() as client:
+#       data = await client.search("artist", 'artist:"Drake"', limit=1)
+
+BASE_URL = os.environ.get("MUSICBRAINZ_URL", "https://musicbrainz.org/ws/2")
+SITE_URL = os.environ.get("MUSICBRAINZ_SITE_URL", "https://musicbrainz.org")
+# MusicBrainz asks every client to identify itself with a contact address
+USER_AGENT = os.environ.get("MUSICBRAINZ_USER_AGENT", "music_data/1.0 (spotify_user@localhost)")
+
+# Lookups waiting on the limiter or the server at once
+MAX_IN_FLIGHT = 100
+# Open connections kept alive to the server
+MAX_CONNECTIONS = 4
+REQUEST_TIMEOUT = 20
+CONNECT_TIMEOUT = 10
+RETRIES = 3
+BACKOFF_FACTOR = 2
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Largest page the browse endpoints return
+BROWSE_LIMIT = 100
+
+
+class MusicBrainzClient:
+    def __init__(self, base_url=BASE_URL, user_agent=USER_AGENT, limiter=musicbrainz_limiter,
+                 max_in_flight=MAX_IN_FLIGHT, max_connections=MAX_CONNECTIONS, retries=RETRIES):
+        self.base_url = base_url.rstrip("/")
+        self.user_agent = user_agent
+        self.limiter = limiter
+        self.max_in_flight = max_in_flight
+        self.max_connections = max_connections
+        self.retries = retries
+        self.session = None
+        self.in_flight = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, sock_connect=CONNECT_TIMEOUT)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={"User-Agent": self.user_agent, "Accept": "application/json"}
+        )
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    # GET {base_url}/{path} and return the decoded JSON, or None once retries are exhausted
+    async def get(self, path, params):
+        return await self.get_url(f"{self.base_url}/{path.strip('/')}", dict(params, fmt="json"), path)
+
+    # GET any MusicBrainz URL returning JSON, such as the site's /artist/<id>/wikipedia-extract
+    async def get_url(self, url, params=None, path=None):
+        params = params or {}
+        path = path or url
+        async with self.in_flight:
+            for attempt in range(self.retries):
+                try:
+                    await self.limiter.acquire_async()
+                    async with self.session.get(url, params=params) as response:
+                        await self.limiter.observe_async(response.status, response.headers.get("Retry-After"))
+                        if response.status == 404:
+                            logger.warning(f"MusicBrainz {path} not found")
+                            return None
+                        # A bad request or a refused one will not improve on retry
+                        if 400 <= response.status < 500 and response.status not in RETRY_STATUSES:
+                            logger.error(f"MusicBrainz {path} answered {response.status}, not retrying")
+                            return None
+                        if response.status not in RETRY_STATUSES:
+                            response.raise_for_status()
+                            return await response.json(content_type=None)
+                        logger.warning(f"MusicBrainz {path} answered {response.status} (attempt {attempt + 1})")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"MusicBrainz {path} request failed (attempt {attempt + 1}): {e!r}")
+                except ValueError:
+                    logger.error(f"Error decoding MusicBrainz {path} response")
+                    return None
+                if attempt < self.retries - 1:
+                    await asyncio.sleep(BACKOFF_FACTOR ** attempt)
+        logger.error(f"Giving up on MusicBrainz {path} {params.get('query', '')}")
+        return None
+
+    # Lucene search over an entity type, e.g. search("release-group", 'releasegroup:"Views"')
+    async def search(self, entity, query, limit=25):
+        return await self.get(entity, {"query": query, "limit": limit})
+
+    # Every entity linked to another one, following the browse endpoint's pages, e.g.
+    # browse("release", {"release-group": mbid, "inc": "media recordings"}); inc values are
+    # space separated so they reach the server as the documented "+" list.
+    # Returns None if any page fails, so callers never store a partial list.
+    async def browse(self, entity, params):
+        results = []
+        offset = 0
+        while True:
+            data = await self.get(entity, dict(params, limit=BROWSE_LIMIT, offset=offset))
+            if data is None:
+                return None
+            page = data.get(f"{entity}s") or []
+            results.extend(page)
+            offset += len(page)
+            if not page or offset >= data.get(f"{entity}-count", 0):
+                return results
@@ -0,0 +1,211 @@
+import json
+import logging
+from bs4 import BeautifulSoup
+from musicbrainz_client import SITE_URL
+from utils import parse_track_number
+
+logger = logging.getLogger(__name__)
+
+# Builds the records the Selenium crawlers scrape from rendered MusicBrainz pages out of
+# the ws/2 JSON web service instead, so a lookup needs no browser at all.
+
+# Release group front covers, redirected to the chosen release's image
+COVER_ART_URL = "https://coverartarchive.org"
+
+# Artist types whose life span the site labels Born/Died rather than Founded/Dissolved
+PERSON_TYPES = ("Person", "Character")
+
+
+# "Artist feat. Other" as the site prints an artist credit
+def credit_phrase(credits):
+    return "".join(credit.get("name", "") + credit.get("joinphrase", "") for credit in credits or [])
+
+
+# The sidebar properties of an artist page, under the labels the page uses
+def artist_properties(artist):
+    properties = {}
+    if artist.get("type"):
+        properties["Type"] = artist["type"]
+    if artist.get("gender"):
+        properties["Gender"] = artist["gender"]
+
+    begin, end = ("Born", "Died") if artist.get("type") in PERSON_TYPES else ("Founded", "Dissolved")
+    life_span = artist.get("life-span") or {}
+    if life_span.get("begin"):
+        properties[begin] = life_span["begin"]
+    if artist.get("begin-area"):
+        properties[f"{begin} in"] = [artist["begin-area"]["name"]]
+    if life_span.get("end"):
+        properties[end] = life_span["end"]
+    if artist.get("end-area"):
+        properties[f"{end} in"] = [artist["end-area"]["name"]]
+    if artist.get("area"):
+        properties["Area"] = [artist["area"]["name"]]
+    if artist.get("ipis"):
+        properties["IPI code"] = ", ".join(artist["ipis"])
+    return properties
+
+
+# Genres first, then the other tags, each by vote count like the page's tag sidebar
+def artist_tags(artist):
+    names = []
+    for key in ("genres", "tags"):
+        for tag in sorted(artist.get(key) or [], key=lambda tag: tag.get("count", 0), reverse=True):
+            if tag["name"] not in names:
+                names.append(tag["name"])
+    return names
+
+
+def wikipedia_text(extract):
+    content = ((extract or {}).get("wikipediaExtract") or {}).get("content")
+    if not content:
+        return None
+    soup = BeautifulSoup(content, "html.parser")
+    paragraphs = [p.get_text().strip() for p in soup.find_all("p")]
+    return "\n".join(p for p in paragraphs if p) or soup.get_text().strip()
+
+
+def release_group_entry(release_group):
+    return {
+        'Album ID': release_group["id"],
+        'Type': release_group.get("primary-type"),
+        'Year': (release_group.get("first-release-date") or "")[:4],
+        'Title': release_group.get("title"),
+        'Artist': credit_phrase(release_group.get("artist-credit"))
+    }
+
+
+# The same artist_data dict crawlArtistInfo.crawl_musicbrainz scrapes, with each release
+# group's MBID under 'Album ID' and primary type under 'Type'.
+# Returns None when MusicBrainz could not be reached.
+async def fetch_artist_data(client, artist_id):
+    artist = await client.get(f"artist/{artist_id}", {"inc": "genres tags"})
+    if artist is None:
+        return None
+
+    # The artist lookup's inc=release-groups stops at 25, so browse them instead. The page's
+    # Album and Single sections only list groups without secondary types (live, compilation...).
+    release_groups = await client.browse("release-group", {
+        "artist": artist_id, "type": "album|single", "inc": "artist-credits"
+    })
+    if release_groups is None:
+        return None
+
+    extract = await client.get_url(f"{SITE_URL}/artist/{artist_id}/wikipedia-extract")
+
+    artist_data = {
+        'Artist ID': artist_id,
+        'Wikipedia Extract': wikipedia_text(extract),
+        'Genres': artist_tags(artist),
+        'Properties': artist_properties(artist),
+        'Albums': [],
+        'Singles': []
+    }
+    for release_group in sorted(release_groups, key=lambda group: group.get("first-release-date") or ""):
+        if release_group.get("secondary-types"):
+            continue
+        if release_group.get("primary-type") == "Album":
+            artist_data['Albums'].append(release_group_entry(release_group))
+        elif release_group.get("primary-type") == "Single":
+            artist_data['Singles'].append(release_group_entry(release_group))
+    logger.info(f"Fetched artist ID {artist_id}: {len(artist_data['Albums'])} albums, {len(artist_data['Singles'])} singles")
+    return artist_data
+
+
+# "2×CD + DVD" as the release group page lists a release's media
+def media_formats(media):
+    counts = {}
+    for medium in media:
+        fmt = medium.get("format") or "(unknown)"
+        counts[fmt] = counts.get(fmt, 0) + 1
+    return " + ".join(fmt if count == 1 else f"{count}×{fmt}" for fmt, count in counts.items())
+
+
+def release_events(release):
+    events = []
+    for event in release.get("release-events") or []:
+        area = event.get("area") or {}
+        country = (area.get("iso-3166-1-codes") or [area.get("name")])[0]
+        events.append(" ".join(part for part in (country, event.get("date")) if part))
+    return ", ".join(event for event in events if event) or release.get("date") or ""
+
+
+# Rows for tracklists, shaped like crawlTracklists' scraped cache entries
+def release_tracklist(release, release_group_id):
+    release_credit = credit_phrase(release.get("artist-credit"))
+    media = release.get("media") or []
+    tracks = []
+    for medium in media:
+        for track in medium.get("tracks") or []:
+            details = {}
+            number = track.get("number") or str(track.get("position", ""))
+            if parse_track_number(number) is None:
+                details['Position'] = number
+            if len(media) > 1:
+                details['Medium'] = medium.get("position")
+            track_credit = credit_phrase(track.get("artist-credit"))
+            if track_credit and track_credit != release_credit:
+                details['Artist'] = track_credit
+            recording = track.get("recording") or {}
+            tracks.append({
+                'title': track.get("title") or recording.get("title"),
+                'length_ms': track.get("length") or recording.get("length"),
+                'number': parse_track_number(number),
+                'variation_id': release["id"],
+                'album_id': release_group_id,
+                'details': json.dumps(details)
+            })
+    return tracks
+
+
+def release_entry(release, release_group_id):
+    media = release.get("media") or []
+    return {
+        'Variation ID': release["id"],
+        'Title': release.get("title"),
+        'Artist': credit_phrase(release.get("artist-credit")),
+        'Format': media_formats(media),
+        'Tracks': sum(medium.get("track-count", 0) for medium in media),
+        'Country/Date': release_events(release),
+        'Label': ", ".join(dict.fromkeys(
+            (info.get("label") or {}).get("name") for info in release.get("label-info") or []
+            if (info.get("label") or {}).get("name")
+        )),
+        'Year': int(release["date"][:4]) if (release.get("date") or "")[:4].isdigit() else None,
+        'Tracklist': release_tracklist(release, release_group_id)
+    }
+
+
+# The data dict crawlAlbumVariationInfo.scrape_musicbrainz_data scrapes, with every
+# release's tracks under 'Tracklist'. One browse page covers up to 100 releases with
+# their media and recordings, replacing a Chrome page load per release.
+# Returns None when MusicBrainz could not be reached.
+async def fetch_release_group_data(client, release_group_id):
+    release_group = await client.get(f"release-group/{release_group_id}", {"inc": "artist-credits genres tags"})
+    if release_group is None:
+        return None
+    releases = await client.browse("release", {
+        "release-group": release_group_id, "inc": "artist-credits labels media recordings"
+    })
+    if releases is None:
+        return None
+    extract = await client.get_url(f"{SITE_URL}/release-group/{release_group_id}/wikipedia-extract")
+
+    has_front = any((release.get("cover-art-archive") or {}).get("front") for release in releases)
+    genres = [genre["name"] for genre in sorted(
+        release_group.get("genres") or [], key=lambda genre: genre.get("count", 0), reverse=True
+    )]
+    data = {
+        'Wikipedia Description': wikipedia_text(extract),
+        'Releases': [release_entry(release, release_group_id) for release in releases],
+        'Album Image URL': f"{COVER_ART_URL}/release-group/{release_group_id}/front-250" if has_front else None,
+        'Artist': credit_phrase(release_group.get("artist-credit")),
+        'Album Type': " + ".join(
+            filter(None, [release_group.get("primary-type")] + (release_group.get("secondary-types") or []))
+        ),
+        'Genres': genres,
+        'Other Tags': [tag["name"] for tag in release_group.get("tags") or [] if tag["name"] not in genres]
+    }
+    logger.info(f"Fetched release group ID {release_group_id}: {len(releases)} releases, "
+                f"{sum(len(release['Tracklist']) for release in data['Releases'])} tracks")
+    return data
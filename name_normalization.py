@@ -0,0 +1,120 @@
+import re
+import unicodedata
+from collections import Counter
+
+# Chart rows spell the same artist many ways ("Beyoncé", "BEYONCE", "Beyonce & JAY-Z",
+# "Bad Bunny x Jhay Cortez"). Raw strings are split into their participants and each
+# participant is folded to a canonical key, so the resolver issues one lookup per real
+# artist and a collaboration resolves every one of its participants.
+
+# feat. / ft. / featuring / w/ / & / + / commas / parentheses / " x " between two names;
+# split_artists first masks an uppercase " X ", so "Malcolm X" stays whole, and the
+# UNSPLIT_NAMES acts wherever they appear
+SEPARATORS = re.compile(
+    r"\s*(?:\(|\)|\b(?:feat|ft)\b\.?|\bfeaturing\b|\bw/|&|\+|,|\s+x\s+)\s*",
+    re.IGNORECASE
+)
+
+# Names that contain a separator but are a single act, as normalized keys
+UNSPLIT_NAMES = {
+    "tyler the creator",
+    "earth wind fire",
+    "simon garfunkel",
+    "mumford sons",
+    "florence the machine",
+    "hall oates",
+    "crosby stills nash young",
+    "years years",
+    "chase status",
+    "g i dle",
+}
+
+# The same names as spelled inside a longer string, e.g. "Tyler, The Creator & Kali Uchis";
+# longest first so a name is never cut short by a shorter one
+PROTECTED_NAMES = re.compile(
+    "|".join(
+        r"\b" + r"\W+".join(re.escape(word) for word in key.split()) + r"\b"
+        for key in sorted(UNSPLIT_NAMES, key=len, reverse=True)
+    ),
+    re.IGNORECASE
+)
+
+# The act's own name in another script after its Latin one, as in "BTS (방탄소년단)":
+# parentheses holding letters but no ASCII ones
+ALIAS = re.compile(r"\s*\((?=[^()]*[^\W\d_])[^()A-Za-z]*\)")
+
+
+# Casefold, strip accents and punctuation, collapse whitespace
+def normalize_name(name):
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(char for char in name if not unicodedata.combining(char)).casefold()
+    name = re.sub(r"[^\w\s]", " ", name)
+    return " ".join(name.split())
+
+
+# Participants of a raw chart artist string, in their original spelling
+def split_artists(raw_name):
+    raw_name = (raw_name or "").strip()
+    if not raw_name or normalize_name(raw_name) in UNSPLIT_NAMES:
+        return [raw_name] if raw_name else []
+
+    # Drop an alias in another script rather than taking it for a second participant
+    name = ALIAS.sub("", raw_name).strip() or raw_name
+
+    # Mask protected names and an uppercase " X " so the separators leave them alone
+    protected = []
+
+    def protect(match):
+        protected.append(match.group(0))
+        return f"\x01{len(protected) - 1}\x01"
+
+    masked = re.sub(r"\s+X\s+", " \0 ", PROTECTED_NAMES.sub(protect, name))
+    participants = []
+    for part in SEPARATORS.split(masked):
+        part = re.sub("\x01(\\d+)\x01", lambda match: protected[int(match.group(1))], part)
+        part = part.replace("\0", "X").strip()
+        if part and normalize_name(part) and part not in participants:
+            participants.append(part)
+    return participants
+
+
+# Canonical lookup keys for a raw chart artist string
+def artist_keys(raw_name):
+    keys = []
+    for participant in split_artists(raw_name):
+        key = normalize_name(participant)
+        if key not in keys:
+            keys.append(key)
+    return keys
+
+
+# Maps raw chart strings to canonical keys and each key to the spelling used to look it up
+class NameIndex:
+    def __init__(self, raw_names=()):
+        self.keys_by_raw = {}
+        self.spellings = {}
+        for raw_name in raw_names:
+            self.add(raw_name)
+
+    def add(self, raw_name):
+        if raw_name in self.keys_by_raw:
+            return self.keys_by_raw[raw_name]
+        keys = []
+        for participant in split_artists(raw_name):
+            key = normalize_name(participant)
+            self.spellings.setdefault(key, Counter())[participant] += 1
+            if key not in keys:
+                keys.append(key)
+        self.keys_by_raw[raw_name] = keys
+        return keys
+
+    def keys(self, raw_name):
+        return self.keys_by_raw.get(raw_name, [])
+
+    # {key: most common spelling}, one entry per real artist
+    def lookup_names(self):
+        return {key: spellings.most_common(1)[0][0] for key, spellings in self.spellings.items()}
+
+    # (raw name, key) pairs for every raw string indexed
+    def pairs(self):
+        return [(raw_name, key) for raw_name, keys in self.keys_by_raw.items() for key in keys]
@@ -0,0 +1,139 @@
+import logging
+import queue
+import threading
+import time
+from db_connection import get_database_connection
+
+logger = logging.getLogger(__name__)
+
+# Single database writer for the crawlers. Scraper workers put results on a bounded queue
+# (put blocks while it is full, so scraping never runs ahead of the database) and one
+# thread drains it, handing up to batch_size items at a time to write_batch(cursor, items)
+# inside one transaction. A batch that fails is retried item by item so one bad record
+# does not take the rest of the batch with it. If the writer thread dies (say the database
+# is unreachable), put() and close() raise WriterStopped instead of blocking forever.
+#
+#   writer = BatchWriter("tracklists", write_tracks, batch_size=50)
+#   writer.start()
+#   writer.put(tracks)
+#   writer.close()
+
+BATCH_SIZE = 50
+MAX_QUEUE = 200
+# Write a partial batch once the oldest queued item has waited this long
+FLUSH_INTERVAL = 2.0
+# How often a blocked put() checks that the writer thread is still alive
+ALIVE_CHECK_INTERVAL = 1.0
+
+_CLOSE = object()
+
+
+class WriterStopped(RuntimeError):
+    pass
+
+
+class BatchWriter:
+    def __init__(self, name, write_batch, batch_size=BATCH_SIZE, max_queue=MAX_QUEUE, flush_interval=FLUSH_INTERVAL):
+        self.name = name
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = None
+        self.error = None
+        self.last_batch_size = 0
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+        self.thread.start()
+        return self
+
+    # Raises WriterStopped if the writer thread is not running
+    def check(self):
+        if self.thread is None or not self.thread.is_alive():
+            raise WriterStopped(f"{self.name} writer is not running") from self.error
+
+    # Blocks while the queue is full
+    def put(self, item):
+        while True:
+            self.check()
+            try:
+                self.queue.put(item, timeout=ALIVE_CHECK_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    # Flush everything queued and stop the writer thread
+    def close(self):
+        self.put(_CLOSE)
+        self.thread.join()
+        logger.info(f"{self.name} writer: {self.written} items in {self.batches} batches, {self.failed} failed")
+        if self.error is not None:
+            raise WriterStopped(f"{self.name} writer stopped with {self.queue_depth()} items unwritten") from self.error
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while batch[-1] is not _CLOSE and len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        try:
+            connection = get_database_connection()
+            try:
+                while True:
+                    batch = self._next_batch()
+                    closing = batch[-1] is _CLOSE
+                    items = [item for item in batch if item is not _CLOSE]
+                    if items:
+                        self._write(connection, items)
+                    if closing:
+                        return
+            finally:
+                connection.close()
+        except Exception as e:
+            self.error = e
+            logger.error(f"{self.name} writer stopped: {e!r}")
+
+    def _write(self, connection, items):
+        self.last_batch_size = len(items)
+        if self._transaction(connection, items):
+            self.written += len(items)
+        elif len(items) > 1:
+            for item in items:
+                if self._transaction(connection, [item]):
+                    self.written += 1
+                else:
+                    self.failed += 1
+        else:
+            self.failed += 1
+        self.batches += 1
+
+    def _transaction(self, connection, items):
+        cursor = connection.cursor()
+        try:
+            self.write_batch(cursor, items)
+            connection.commit()
+            return True
+        except Exception as e:
+            connection.rollback()
+            logger.error(f"{self.name} writer: batch of {len(items)} failed: {e}")
+            return False
+        finally:
+            cursor.close()
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Token bucket shared by every thread and every process on this machine. The bucket
+# state lives in a small JSON file guarded by an OS file lock, so the scheduler's
+# subprocesses draw from the same budget. A 503/429 halves the rate and blocks all
+# callers for Retry-After seconds; each success then adds the rate back gradually.
+
+STATE_DIR = os.environ.get("RATE_LIMIT_DIR", tempfile.gettempdir())
+
+# Seconds to back off after a 503 without a usable Retry-After header
+DEFAULT_BACKOFF = 5
+# Requests per second regained after each successful response, up to the configured rate
+RECOVERY_STEP = 0.05
+
+
+def lock_file(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def unlock_file(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# Retry-After is either a number of seconds or an HTTP date
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    def __init__(self, name, rate=1.0, burst=1, min_rate=0.1, state_dir=STATE_DIR):
+        self.name = name
+        self.max_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.path = os.path.join(state_dir, f"{name}.ratelimit")
+        # flock does not exclude threads sharing a process, this does
+        self.thread_lock = threading.Lock()
+
+    # Run update(state, now) on the shared state under the file lock and save the result
+    def _update(self, update):
+        with self.thread_lock, open(self.path, "a+") as f:
+            lock_file(f)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                now = time.time()
+                state.setdefault("rate", self.max_rate)
+                state.setdefault("tokens", float(self.burst))
+                state.setdefault("updated", now)
+                state.setdefault("blocked_until", 0.0)
+
+                # Refill since the last update
+                state["tokens"] = min(self.burst, state["tokens"] + (now - state["updated"]) * state["rate"])
+                state["updated"] = now
+                result = update(state, now)
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                unlock_file(f)
+
+    # Take a token if one is available, otherwise return how long to wait
+    def _try_acquire(self, state, now):
+        if state["blocked_until"] > now:
+            return state["blocked_until"] - now
+        if state["tokens"] >= 1:
+            state["tokens"] -= 1
+            return 0
+        return (1 - state["tokens"]) / state["rate"]
+
+    # Block until the caller may send one request
+    def acquire(self):
+        while True:
+            wait = self._update(self._try_acquire)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    # Same as acquire for coroutines; the file lock may block, so it is taken on a worker thread
+    async def acquire_async(self):
+        while True:
+            wait = await asyncio.to_thread(self._update, self._try_acquire)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    # Feed back the outcome of a request: back off on 503/429, recover on success
+    def observe(self, status, retry_after=None):
+        if status in (429, 503):
+            delay = parse_retry_after(retry_after)
+            if delay is None:
+                delay = DEFAULT_BACKOFF
+
+            def backoff(state, now):
+                state["blocked_until"] = max(state["blocked_until"], now + delay)
+                state["rate"] = max(self.min_rate, state["rate"] / 2)
+                state["tokens"] = 0.0
+                return state["rate"]
+
+            rate = self._update(backoff)
+            logger.warning(f"{self.name} answered {status}, pausing {delay:.1f}s and slowing to {rate:.2f} req/s")
+        elif status < 400:
+            def recover(state, now):
+                state["rate"] = min(self.max_rate, state["rate"] + RECOVERY_STEP)
+
+            self._update(recover)
+
+    async def observe_async(self, status, retry_after=None):
+        await asyncio.to_thread(self.observe, status, retry_after)
+
+
+# MusicBrainz allows one request per second per client
+musicbrainz_limiter = RateLimiter("musicbrainz", rate=1.0, burst=1)
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# On-disk cache of MusicBrainz lookups shared by every resolver and every scheduler
+# subprocess. Entries are positive (a resolved value) or negative (known to have no
+# match), expire after their TTL, and the least recently used ones are evicted once
+# a namespace grows past max_entries. The database is opened on first use, so importing
+# a resolver does not create the file.
+
+CACHE_PATH = os.environ.get(
+    "RESOLUTION_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "resolution_cache.sqlite3")
+)
+
+POSITIVE_TTL = 30 * 24 * 3600
+NEGATIVE_TTL = 24 * 3600
+MAX_ENTRIES = 200000
+# Check the size limit after this many writes
+EVICT_EVERY = 500
+
+
+class ResolutionCache:
+    def __init__(self, namespace, path=CACHE_PATH, positive_ttl=POSITIVE_TTL,
+                 negative_ttl=NEGATIVE_TTL, max_entries=MAX_ENTRIES):
+        self.namespace = namespace
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.db = None
+
+    # Called with self.lock held
+    def _connect(self):
+        if self.db is not None:
+            return self.db
+        # SQLite's file locking coordinates the scheduler's separate processes
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS resolutions (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            self.db.execute("CREATE INDEX IF NOT EXISTS resolutions_lru ON resolutions (namespace, last_used)")
+        return self.db
+
+    # Returns (found, value); value is None for a negative entry
+    def get(self, key):
+        now = time.time()
+        with self.lock, self._connect():
+            row = self.db.execute(
+                "SELECT value, expires_at FROM resolutions WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return False, None
+            value, expires_at = row
+            if expires_at <= now:
+                self.db.execute("DELETE FROM resolutions WHERE namespace = ? AND key = ?", (self.namespace, key))
+                return False, None
+            self.db.execute(
+                "UPDATE resolutions SET last_used = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+        return True, None if value is None else json.loads(value)
+
+    # Store a resolved value, or a negative entry when value is None
+    def put(self, key, value):
+        now = time.time()
+        ttl = self.negative_ttl if value is None else self.positive_ttl
+        encoded = None if value is None else json.dumps(value)
+        with self.lock, self._connect():
+            self.db.execute("""
+                INSERT INTO resolutions (namespace, key, value, expires_at, last_used)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (namespace, key) DO UPDATE SET
+                    value = excluded.value, expires_at = excluded.expires_at, last_used = excluded.last_used
+            """, (self.namespace, key, encoded, now + ttl, now))
+            self.writes += 1
+            if self.writes % EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now):
+        expired = self.db.execute(
+            "DELETE FROM resolutions WHERE namespace = ? AND expires_at <= ?", (self.namespace, now)
+        ).rowcount
+        count = self.db.execute(
+            "SELECT COUNT(*) FROM resolutions WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        evicted = 0
+        if count > self.max_entries:
+            evicted = self.db.execute("""
+                DELETE FROM resolutions WHERE namespace = ? AND key IN (
+                    SELECT key FROM resolutions WHERE namespace = ? ORDER BY last_used LIMIT ?
+                )
+            """, (self.namespace, self.namespace, count - self.max_entries)).rowcount
+        if expired or evicted:
+            logger.info(f"Resolution cache {self.namespace}: dropped {expired} expired and {evicted} least recently used entries")
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Background resource sampler for crawler runs. A daemon thread records CPU, RSS, thread
+# count, running Chrome/chromedriver processes and any registered gauges (queue depth,
+# pending lookups, ...) every few seconds into a ring buffer. Each sample is exported as a
+# Prometheus textfile (for node_exporter's textfile collector) or appended to a JSONL file,
+# so the crawl threads never wait on monitoring.
+#
+#   with ResourceMonitor("crawlTracklists") as monitor:
+#       monitor.gauge("queue_depth", work_queue.qsize)
+#       ...
+
+# Next to the scripts, not in whatever directory the scheduler was started from
+METRICS_DIR = os.environ.get(
+    "RESOURCE_METRICS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics")
+)
+# "prom" or "jsonl"
+METRICS_FORMAT = os.environ.get("RESOURCE_METRICS_FORMAT", "prom")
+
+SAMPLE_INTERVAL = 5
+# Samples kept in memory, one hour at the default interval
+CAPACITY = 720
+
+
+class ResourceMonitor:
+    def __init__(self, name, interval=SAMPLE_INTERVAL, capacity=CAPACITY,
+                 metrics_dir=METRICS_DIR, metrics_format=METRICS_FORMAT):
+        self.name = name
+        self.interval = interval
+        self.samples = deque(maxlen=capacity)
+        self.metrics_dir = metrics_dir
+        self.metrics_format = metrics_format
+        self.gauges = {}
+        self.process = psutil.Process()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Register a callable sampled alongside the process metrics, e.g. a queue's qsize
+    def gauge(self, name, read):
+        self.gauges[name] = read
+
+    def start(self):
+        if self.metrics_dir:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+        # The first cpu_percent(None) call only sets the baseline
+        self.process.cpu_percent(None)
+        self.thread = threading.Thread(target=self._run, name=f"{self.name}-monitor", daemon=True)
+        self.thread.start()
+
+    # Take a last sample so short runs still export something
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+        self._record()
+        sample = self.latest()
+        if sample is None:
+            logger.warning(f"{self.name} resources: no samples recorded")
+            return
+        logger.info(
+            f"{self.name} resources: CPU {sample['cpu_percent']:.0f}%, RSS {sample['rss_bytes'] / 1024 ** 2:.0f} MB, "
+            f"{sample['threads']} threads, {sample['chrome_processes']} Chrome processes"
+        )
+
+    def latest(self):
+        return self.samples[-1] if self.samples else None
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self._record()
+
+    def _record(self):
+        try:
+            sample = self.sample()
+            self.samples.append(sample)
+            self.export(sample)
+        except Exception as e:
+            logger.warning(f"Resource sampling failed: {e!r}")
+
+    def sample(self):
+        with self.process.oneshot():
+            sample = {
+                "time": time.time(),
+                # Since the previous sample, never blocks
+                "cpu_percent": self.process.cpu_percent(None),
+                "rss_bytes": self.process.memory_info().rss,
+                "threads": self.process.num_threads(),
+            }
+        chrome = 0
+        for child in self.process.children(recursive=True):
+            try:
+                if "chrome" in child.name().lower():
+                    chrome += 1
+            except psutil.Error:
+                pass
+        sample["chrome_processes"] = chrome
+        sample["system_available_bytes"] = psutil.virtual_memory().available
+        for name, read in self.gauges.items():
+            try:
+                sample[name] = read()
+            except Exception:
+                sample[name] = None
+        return sample
+
+    def export(self, sample):
+        if not self.metrics_dir:
+            return
+        if self.metrics_format == "jsonl":
+            with open(os.path.join(self.metrics_dir, f"{self.name}.jsonl"), "a") as f:
+                f.write(json.dumps(sample) + "\n")
+            return
+
+        lines = []
+        for key, value in sample.items():
+            if key == "time" or value is None:
+                continue
+            metric = f"crawler_{key}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f'{metric}{{crawler="{self.name}"}} {value}')
+        lines.append("# TYPE crawler_last_sample_timestamp_seconds gauge")
+        lines.append(f'crawler_last_sample_timestamp_seconds{{crawler="{self.name}"}} {sample["time"]:.3f}')
+
+        # Write then rename so the collector never reads a half written file
+        path = os.path.join(self.metrics_dir, f"{self.name}.prom")
+        with open(f"{path}.tmp", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(f"{path}.tmp", path)
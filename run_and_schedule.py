@@ -8,18 +8,23 @@ from threading import Timer
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def run_script(script_name):
-    logger.info(f"Starting the script: {script_name}")
-    result = subprocess.run(["python", script_name], capture_output=True, text=True)
+def run_script(script_name, *args):
+    logger.info(f"Starting the script: {' '.join([script_name, *args])}")
+    result = subprocess.run(["python", script_name, *args], capture_output=True, text=True)
     logger.info(f"Script {script_name} finished with output:\n{result.stdout}")
     if result.stderr:
         logger.error(f"Script {script_name} encountered errors:\n{result.stderr}")
 
-def run_daily():
-    run_script("daily.py")
+# ingest_charts.py fetches the sources of one cadence concurrently; unchanged pages are skipped
+def run_daily_charts():
+    run_script("ingest_charts.py", "--cadence", "daily")
 
-def run_weekly():
-    run_script("weekly.py")
+# Weekly charts are published on Fridays and stored under the Thursday ending their week
+def run_weekly_charts():
+    run_script("ingest_charts.py", "--cadence", "weekly")
+
+def run_top_lists():
+    run_script("ingest_charts.py", "--cadence", "fortnightly")
 
 def run_crawl_artist_id():
     run_script("crawlArtistID.py")
@@ -36,20 +41,14 @@ def run_crawl_album_variation_info():
 def run_crawl_tracklists():
     run_script("crawlTracklists.py")
 
-def run_top_artists():
-    run_script("top_artists.py")
-
-def run_top_listeners():
-    run_script("top_listeners.py")
-
 def stop_scheduler():
     logger.info("Stopping the scheduler after running for 1 hour.")
     global scheduler_running
     scheduler_running = False
 
 # Schedule the scripts
-schedule.every().day.at("01:00").do(run_daily)
-schedule.every().week.do(run_weekly)
+schedule.every().day.at("01:00").do(run_daily_charts)
+schedule.every().saturday.at("01:30").do(run_weekly_charts)
 schedule.every().day.at("02:00").do(run_crawl_artist_id)
 schedule.every().day.at("03:00").do(run_crawl_artist_info)
 
@@ -58,8 +57,7 @@ schedule.every(2).hours.at(":40").do(run_crawl_album_variation_id)
 schedule.every(2).hours.at(":40").do(run_crawl_album_variation_info)
 schedule.every(2).hours.at(":40").do(run_crawl_tracklists)
 
-schedule.every(14).days.do(run_top_artists)
-schedule.every(14).days.do(run_top_listeners)
+schedule.every(14).days.do(run_top_lists)
 
 logger.info("Scheduler started with the defined schedules.")
 
@@ -0,0 +1,76 @@
+import logging
+import unicodedata
+import mysql.connector
+from chart_loader import insert_records
+
+logger = logging.getLogger(__name__)
+
+# Delta-compressed history tables: a row is written for an artist only when its values
+# differ from the artist's previous row, and a tombstone (is_present = FALSE) when the
+# artist drops off the list. The snapshot for any date is the latest row per artist
+# on or before that date, ignoring tombstones.
+
+
+# The history tables' primary key compares artists under the server's default case- and
+# accent-insensitive collation, so "ROSÉ" and "Rosé" are one artist there and must be here
+def artist_key(artist):
+    artist = unicodedata.normalize("NFKD", artist)
+    return "".join(char for char in artist if not unicodedata.combining(char)).casefold()
+
+
+# Reconstruct the snapshot as of snapshot_date as {artist: (values...)}
+def read_snapshot(cursor, table_name, value_columns, snapshot_date):
+    columns = ", ".join(f"h.{column}" for column in value_columns)
+    cursor.execute(f"""
+        SELECT h.artist, h.is_present, {columns}
+        FROM {table_name} h
+        JOIN (
+            SELECT artist, MAX(snapshot_date) AS snapshot_date
+            FROM {table_name}
+            WHERE snapshot_date <= %s
+            GROUP BY artist
+        ) latest ON latest.artist = h.artist AND latest.snapshot_date = h.snapshot_date
+    """, (snapshot_date,))
+    return {row[0]: tuple(row[2:]) for row in cursor.fetchall() if row[1]}
+
+
+# Store records [(artist, values...)] as the snapshot for snapshot_date, writing only
+# changed, new and removed artists. Re-running for the same date replaces that delta.
+def write_snapshot(conn, table_name, value_columns, records, snapshot_date):
+    # artist_key -> (artist as first spelled, values)
+    current = {}
+    for artist, *values in records:
+        current.setdefault(artist_key(artist), (artist, tuple(values)))
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {table_name} WHERE snapshot_date = %s", (snapshot_date,))
+        previous = {
+            artist_key(artist): (artist, values)
+            for artist, values in read_snapshot(cursor, table_name, value_columns, snapshot_date).items()
+        }
+
+        changes = [
+            (artist, snapshot_date, True) + values
+            for key, (artist, values) in current.items()
+            if previous.get(key, (None, None))[1] != values
+        ]
+        removed = [
+            (previous[key][0], snapshot_date, False) + (None,) * len(value_columns)
+            for key in previous.keys() - current.keys()
+        ]
+        insert_records(
+            cursor, table_name, ("artist", "snapshot_date", "is_present") + tuple(value_columns), changes + removed
+        )
+        conn.commit()
+        logger.info(
+            f"Snapshot {snapshot_date} of {table_name}: {len(changes)} changed, "
+            f"{len(removed)} removed, {len(current) - len(changes)} unchanged"
+        )
+        return len(changes) + len(removed)
+    except mysql.connector.Error as err:
+        conn.rollback()
+        logger.error(f"Error writing snapshot {snapshot_date} of {table_name}: {err}")
+        return None
+    finally:
+        cursor.close()
@@ -0,0 +1,68 @@
+import os
+import sys
+import pytest
+
+# The scripts are top-level modules in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class RecordingCursor:
+    # Just enough of a MySQL cursor: statements are recorded on the connection, whitespace
+    # collapsed, and execute() results come from the connection's respond(query, params)
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        self.connection.statements.append((query, params))
+        self.rows = list(self.connection.respond(query, params) or [])
+        self.rowcount = len(self.rows)
+
+    def executemany(self, query, seq):
+        seq = list(seq)
+        self.connection.statements.append((" ".join(query.split()), seq))
+        self.rowcount = len(seq)
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self, respond=None):
+        self.respond = respond or (lambda query, params: [])
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+    # Recorded (query, params) pairs whose query starts with prefix
+    def executed(self, prefix=""):
+        return [(query, params) for query, params in self.statements if query.startswith(prefix)]
+
+
+# Factory for connections recording their statements, e.g.
+#   conn = recording_connection(lambda query, params: [("rg-held",)] if query.startswith("SELECT") else [])
+@pytest.fixture
+def recording_connection():
+    return RecordingConnection
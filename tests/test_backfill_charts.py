@@ -0,0 +1,120 @@
+import functools
+import os
+import shutil
+import threading
+from datetime import date
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import backfill_charts
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "kworb")
+DAILY_PAGE = os.path.join(FIXTURE_DIR, "global_daily.html")
+
+
+# BackfillProgress as a {(source, chart_date): (status, row_count)} dict behind a
+# recording connection that answers the statements backfill issues
+@pytest.fixture
+def progress(recording_connection):
+    checkpoints = {}
+
+    def respond(query, params):
+        if "INSERT INTO BackfillProgress" in query:
+            source, chart_date, status, row_count = params
+            checkpoints[(source, chart_date)] = (status, row_count)
+        elif "FROM BackfillProgress" in query:
+            start, end, *rest = params
+            statuses = {value for value in rest if value in ("done", "missing")}
+            return [
+                key for key, (status, _) in checkpoints.items()
+                if start <= key[1] <= end and key[0] in rest and status in statuses
+            ]
+        return []
+
+    return recording_connection(respond), checkpoints
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    monkeypatch.setenv("no_proxy", "127.0.0.1,localhost")
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(tmp_path))
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield tmp_path, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    loads = []
+    monkeypatch.setattr(backfill_charts, "ensure_chart_partitions", lambda cursor, start, end: None)
+
+    def load_chart_frame(conn, source, chart_date, frame):
+        loads.append((source, chart_date))
+        return len(frame)
+
+    monkeypatch.setattr(backfill_charts, "load_chart_frame", load_chart_frame)
+    return loads
+
+
+def publish(root, source, chart_date):
+    directory = root / source
+    directory.mkdir(exist_ok=True)
+    shutil.copy(DAILY_PAGE, directory / f"{chart_date:%Y%m%d}.html")
+
+
+def test_done_and_missing(archive, loaded, progress):
+    root, url = archive
+    publish(root, "global_daily", date(2024, 1, 1))
+    publish(root, "global_daily", date(2024, 1, 3))
+    conn, checkpoints = progress
+
+    statuses = backfill_charts.backfill(conn, ["global_daily"], date(2024, 1, 1), date(2024, 1, 3), url, workers=2)
+
+    assert statuses == {"done": 2, "missing": 1, "failed": 0}
+    assert checkpoints[("global_daily", date(2024, 1, 1))] == ("done", 60)
+    assert checkpoints[("global_daily", date(2024, 1, 2))] == ("missing", None)
+    assert sorted(loaded) == [("global_daily", date(2024, 1, 1)), ("global_daily", date(2024, 1, 3))]
+
+
+def test_resume_skips_checkpointed_pages(archive, loaded, progress):
+    root, url = archive
+    for day in (1, 2, 3):
+        publish(root, "global_daily", date(2024, 1, day))
+    conn, checkpoints = progress
+    # An earlier run stopped after the first page
+    checkpoints[("global_daily", date(2024, 1, 1))] = ("done", 60)
+
+    statuses = backfill_charts.backfill(conn, ["global_daily"], date(2024, 1, 1), date(2024, 1, 3), url)
+    assert statuses == {"done": 2, "missing": 0, "failed": 0}
+    assert sorted(loaded) == [("global_daily", date(2024, 1, 2)), ("global_daily", date(2024, 1, 3))]
+
+    # Nothing left to do on a second resume
+    statuses = backfill_charts.backfill(conn, ["global_daily"], date(2024, 1, 1), date(2024, 1, 3), url)
+    assert statuses == {"done": 0, "missing": 0, "failed": 0}
+    assert len(loaded) == 2
+
+
+def test_retry_missing(archive, loaded, progress):
+    root, url = archive
+    conn, checkpoints = progress
+    backfill_charts.backfill(conn, ["global_daily"], date(2024, 1, 2), date(2024, 1, 2), url)
+    assert checkpoints[("global_daily", date(2024, 1, 2))] == ("missing", None)
+
+    # The page shows up later: skipped by default, fetched with retry_missing
+    publish(root, "global_daily", date(2024, 1, 2))
+    statuses = backfill_charts.backfill(conn, ["global_daily"], date(2024, 1, 2), date(2024, 1, 2), url)
+    assert statuses == {"done": 0, "missing": 0, "failed": 0}
+
+    statuses = backfill_charts.backfill(conn, ["global_daily"], date(2024, 1, 2), date(2024, 1, 2), url,
+                                        retry_missing=True)
+    assert statuses == {"done": 1, "missing": 0, "failed": 0}
+    assert checkpoints[("global_daily", date(2024, 1, 2))] == ("done", 60)
+
+
+def test_weekly_dates_follow_the_chart_weekday():
+    dates = list(backfill_charts.chart_dates("global_weekly", date(2024, 1, 1), date(2024, 1, 31)))
+    assert dates == [date(2024, 1, 4), date(2024, 1, 11), date(2024, 1, 18), date(2024, 1, 25)]
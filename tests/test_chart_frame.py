@@ -0,0 +1,24 @@
+from chart_frame import to_chart_frame
+
+
+HEADERS = ["Pos", "P+", "Artist and Title", "Streams", "Streams+"]
+
+
+def test_numbers_are_typed():
+    frame = to_chart_frame(HEADERS, [["1", "+3", "Rosé - APT.", "1,234,567", "-7,890"]])
+    assert frame.loc[0, "streams"] == 1234567
+    assert frame.loc[0, "streams_change"] == -7890
+    assert frame.loc[0, "position_delta"] == 3
+    assert (frame.loc[0, "artist"], frame.loc[0, "title"]) == ("Rosé", "APT.")
+
+
+def test_fractional_values_are_rounded_not_truncated(caplog):
+    rows = [
+        ["1", "=", "A - B", "108,964.5", "-2.5"],
+        ["2", "NEW", "C - D", "108,964.4", "+0.6"],
+    ]
+    frame = to_chart_frame(HEADERS, rows)
+    assert frame["streams"].tolist() == [108965, 108964]
+    assert frame["streams_change"].tolist() == [-3, 1]
+    assert str(frame["streams"].dtype) == "int64"
+    assert "Rounding 4 fractional chart values" in caplog.text
@@ -0,0 +1,34 @@
+from datetime import date
+
+import chart_loader
+
+
+def partitions(rows):
+    return lambda query, params: rows if "information_schema.partitions" in query else []
+
+
+def test_month_is_split_off_the_maxvalue_partition(recording_connection):
+    conn = recording_connection(partitions([("p202409", "'2024-10-01'"), ("pmax", "MAXVALUE")]))
+    chart_loader.ensure_chart_partitions(conn.cursor(), date(2024, 10, 17))
+
+    (alter, _), = conn.executed("ALTER TABLE")
+    assert "REORGANIZE PARTITION pmax INTO ( PARTITION p202410 VALUES LESS THAN ('2024-11-01')" in alter
+
+
+def test_unpartitioned_table_still_loads(recording_connection, caplog):
+    conn = recording_connection(partitions([]))
+    records = [("global_daily", date(2024, 10, 17), 1)]
+
+    assert chart_loader.replace_chart_entries(conn, "global_daily", date(2024, 10, 17), records) == 1
+    assert "chart_entries is not partitioned" in caplog.text
+    assert not conn.executed("ALTER TABLE")
+    assert conn.executed("INSERT INTO chart_entries")
+    assert conn.commits == 1
+
+
+def test_month_past_the_last_partition_is_reported(recording_connection, caplog):
+    conn = recording_connection(partitions([("p202409", "'2024-10-01'")]))
+    chart_loader.ensure_chart_partitions(conn.cursor(), date(2024, 10, 17))
+
+    assert "No chart_entries partition covers 2024-10" in caplog.text
+    assert not conn.executed("ALTER TABLE")
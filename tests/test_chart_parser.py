@@ -0,0 +1,38 @@
+import glob
+import os
+import pytest
+from utils import etree, iter_chart_rows_lxml, iter_chart_rows_soup, parse_chart_table
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "kworb")
+FIXTURES = sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html")))
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_fixtures_present():
+    assert {os.path.basename(path) for path in FIXTURES} >= {"global_daily.html", "artists.html"}
+
+
+@pytest.mark.skipif(etree is None, reason="lxml not installed")
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_lxml_matches_soup(path):
+    content = read(path)
+    assert list(iter_chart_rows_lxml(content)) == list(iter_chart_rows_soup(content))
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_every_row_has_a_cell_per_header(path):
+    headers, rows = parse_chart_table(read(path))
+    rows = list(rows)
+    assert rows
+    assert all(len(row) == len(headers) for row in rows)
+
+
+def test_non_ascii_cells():
+    _, rows = parse_chart_table(read(os.path.join(FIXTURE_DIR, "global_daily.html")))
+    titles = [row[2] for row in rows]
+    assert titles[0] == "Rosé - APT. (w/ Bruno Mars)"
+    assert any("방탄소년단" in title for title in titles)
@@ -0,0 +1,15 @@
+import crawlAlbumVariationID
+
+
+def test_rows_resolving_to_a_held_release_group_are_kept(recording_connection, caplog):
+    def respond(query, params):
+        return [(album_id,) for album_id in params if album_id == "rg-held"] if query.startswith("SELECT") else []
+
+    conn = recording_connection(respond)
+    crawlAlbumVariationID.write_updates(conn, [("rg-held", 1), ("rg-new", 2), ("rg-new", 3)])
+
+    assert not conn.executed("DELETE")
+    assert conn.statements[-1] == ("UPDATE albums SET album_id = %s WHERE no = %s", [("rg-new", 2)])
+    assert conn.commits == 1
+    assert "Album no 1 resolves to release group rg-held" in caplog.text
+    assert "Album no 3 resolves to release group rg-new" in caplog.text
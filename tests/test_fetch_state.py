@@ -0,0 +1,27 @@
+import multiprocessing
+
+import fetch_state
+from fetch_state import FetchResult
+
+
+def remember_many(worker, count):
+    for number in range(count):
+        url = f"https://kworb.net/{worker}/{number}.html"
+        fetch_state.remember_fetch(FetchResult(url, None, True, f'"{worker}-{number}"', None, "hash"))
+
+
+def test_concurrent_writers_keep_every_entry(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_state, "STATE_PATH", str(tmp_path / "fetch_state.json"))
+    # fork, so the workers inherit the patched path
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=remember_many, args=(worker, 25)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    state = fetch_state.load_fetch_state()
+    assert len(state) == 100
+    assert state["https://kworb.net/3/24.html"]["etag"] == '"3-24"'
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["fetch_state.json", "fetch_state.json.lock"]
@@ -0,0 +1,31 @@
+from datetime import date
+
+import ingest_charts
+from chart_loader import weekly_chart_date
+
+
+def test_sources_keep_their_cadence():
+    daily = ingest_charts.build_sources(["us"], ["daily"])
+    assert [source.name for source in daily] == ["global_daily", "us_daily"]
+
+    weekly = ingest_charts.build_sources(["us"], ["weekly"])
+    assert [source.name for source in weekly] == ["global_weekly", "us_weekly"]
+
+    fortnightly = ingest_charts.build_sources(["us"], ["fortnightly"])
+    assert [source.name for source in fortnightly] == ["artists", "listeners"]
+
+    assert len(ingest_charts.build_sources(["us"])) == 6
+
+
+def test_weekly_charts_are_dated_by_their_thursday():
+    # Every day of the week after Thursday 2024-10-17 maps back to it
+    for day in range(17, 24):
+        assert weekly_chart_date(date(2024, 10, day)) == date(2024, 10, 17)
+
+    saturday = date(2024, 10, 19)
+    weekly, daily = (
+        next(source for source in ingest_charts.GLOBAL_SOURCES if source.name == name)
+        for name in ("global_weekly", "global_daily")
+    )
+    assert ingest_charts.source_date(weekly, saturday) == date(2024, 10, 17)
+    assert ingest_charts.source_date(daily, saturday) == saturday
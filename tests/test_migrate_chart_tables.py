@@ -0,0 +1,24 @@
+from datetime import date
+
+import migrate_chart_tables
+
+
+def test_weekly_tables_are_filed_under_their_chart_thursday(recording_connection):
+    tables = [
+        ("SpotifyWeekly_20241019",), ("SpotifyWeekly_20241017",), ("SpotifyTopChart_20241019",),
+        ("spotifyweekly_20241026",), ("Albums",),
+    ]
+    conn = recording_connection(lambda query, params: tables)
+
+    found = [
+        (table_name, chart, chart_date)
+        for table_name, chart, chart_date, _ in migrate_chart_tables.find_legacy_tables(conn.cursor())
+    ]
+
+    # Saturday's run and Thursday's both hold the week ending Thursday 2024-10-17
+    assert found == [
+        ("SpotifyWeekly_20241017", "global_weekly", date(2024, 10, 17)),
+        ("SpotifyWeekly_20241019", "global_weekly", date(2024, 10, 17)),
+        ("SpotifyTopChart_20241019", "global_daily", date(2024, 10, 19)),
+        ("spotifyweekly_20241026", "global_weekly", date(2024, 10, 24)),
+    ]
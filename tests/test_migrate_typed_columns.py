@@ -0,0 +1,32 @@
+import migrate_typed_columns
+from migrate_typed_columns import MIGRATIONS
+
+TRACKLISTS = MIGRATIONS["TrackLists"][1]
+
+
+def test_vinyl_positions_move_into_detail(recording_connection):
+    conn = recording_connection()
+    rows = [(1, "3", "3:15"), (2, " A1 ", "4:00"), (3, "", "?:??"), (4, None, None)]
+
+    migrate_typed_columns.convert_rows(conn.cursor(), "TrackLists", "track_id", TRACKLISTS, rows)
+
+    (_, typed), (kept_query, kept) = conn.statements
+    assert typed == [(3, 195000, 1), (None, 240000, 2), (None, None, 3), (None, None, 4)]
+    assert "SET detail = JSON_SET(COALESCE(NULLIF(detail, ''), '{}'), '$.Position', %s)" in kept_query
+    assert kept == [("A1", 2)]
+
+
+def test_other_tables_keep_nothing(recording_connection):
+    conn = recording_connection()
+    columns = MIGRATIONS["TopArtists"][1]
+    migrate_typed_columns.convert_rows(conn.cursor(), "TopArtists", "chart_id", columns, [(1, "n/a", "1", "2", "3", "4")])
+    assert len(conn.statements) == 1
+
+
+def test_kept_positions_are_not_lost(recording_connection):
+    conn = recording_connection(lambda query, params: [(0, None, None)])
+    assert migrate_typed_columns.lost_values(conn.cursor(), "TrackLists", TRACKLISTS) == {}
+
+    number, length = (query for query, _ in conn.statements)
+    assert "JSON_EXTRACT(detail, '$.Position')) <=> TRIM(number)" in number
+    assert "JSON_EXTRACT" not in length
@@ -0,0 +1,48 @@
+import asyncio
+
+from aiohttp import web
+
+import musicbrainz_client
+from musicbrainz_client import MusicBrainzClient
+
+
+class NoLimit:
+    async def acquire_async(self):
+        pass
+
+    async def observe_async(self, status, retry_after=None):
+        pass
+
+
+# Serves /<status> with that status code and counts the requests per path
+async def serve(hits):
+    async def handler(request):
+        status = int(request.match_info["status"])
+        hits[status] = hits.get(status, 0) + 1
+        return web.json_response({"status": status}, status=status)
+
+    app = web.Application()
+    app.router.add_get("/{status}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_client_errors_are_not_retried(monkeypatch):
+    monkeypatch.setattr(musicbrainz_client, "BACKOFF_FACTOR", 0)
+    hits = {}
+
+    async def run():
+        runner, base_url = await serve(hits)
+        try:
+            async with MusicBrainzClient(base_url=base_url, limiter=NoLimit(), retries=3) as client:
+                return [await client.get(str(status), {}) for status in (200, 400, 403, 404, 503)]
+        finally:
+            await runner.cleanup()
+
+    results = asyncio.run(run())
+    assert results == [{"status": 200}, None, None, None, None]
+    assert hits == {200: 1, 400: 1, 403: 1, 404: 1, 503: 3}
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+
+import musicbrainz_json
+from musicbrainz_client import MusicBrainzClient
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "musicbrainz")
+
+RELEASE_GROUP_ID = "b8f4e6ac-3c5d-4a6e-9d0b-1f2a3c4d5e6f"
+ARTIST_ID = "0a1b2c3d-4e5f-4a6b-8c7d-9e0f1a2b3c4d"
+GET_LUCKY = "Daft Punk feat. Pharrell Williams"
+
+
+def load(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FixtureClient(MusicBrainzClient):
+    # Answers lookups and browse pages from the saved ws/2 payloads, two entities per page
+    # so browse() has to follow the offsets
+    PAGE = 2
+
+    async def get(self, path, params):
+        entity = path.split("/")[0]
+        if "/" in path:
+            return load(f"{entity}.json")
+        payload = load(f"{entity}-browse.json")
+        offset = params["offset"]
+        return dict(payload, **{f"{entity}s": payload[f"{entity}s"][offset:offset + self.PAGE]})
+
+    async def get_url(self, url, params=None, path=None):
+        if url.endswith(f"release-group/{RELEASE_GROUP_ID}/wikipedia-extract"):
+            return load("release-group-wikipedia-extract.json")
+        return None
+
+
+def release_group_data():
+    return asyncio.run(musicbrainz_json.fetch_release_group_data(FixtureClient(), RELEASE_GROUP_ID))
+
+
+def test_release_group_fields():
+    data = release_group_data()
+    assert data['Artist'] == "Daft Punk"
+    assert data['Album Type'] == "Album"
+    assert data['Genres'] == ["electronic", "disco"]
+    assert data['Other Tags'] == ["french house"]
+    assert data['Album Image URL'] == f"https://coverartarchive.org/release-group/{RELEASE_GROUP_ID}/front-250"
+    assert data['Wikipedia Description'] == (
+        "Random Access Memories is the fourth studio album by French electronic duo Daft Punk.\n"
+        "It was released in May 2013."
+    )
+    assert [release['Variation ID'][-1] for release in data['Releases']] == ["1", "2", "3"]
+
+
+def test_release_with_several_events_and_labels():
+    release = release_group_data()['Releases'][0]
+    assert release['Format'] == "CD"
+    assert release['Tracks'] == 3
+    assert release['Country/Date'] == "XE 2013-05-17, US 2013-05-21"
+    assert release['Label'] == "Columbia"
+    assert release['Year'] == 2013
+
+    numbers = [track['number'] for track in release['Tracklist']]
+    assert numbers == [1, 2, 3]
+    assert [json.loads(track['details']) for track in release['Tracklist']] == [{}, {}, {'Artist': GET_LUCKY}]
+    assert {track['album_id'] for track in release['Tracklist']} == {RELEASE_GROUP_ID}
+
+
+def test_multi_medium_vinyl_release():
+    release = release_group_data()['Releases'][1]
+    assert release['Format'] == '2×12" Vinyl'
+    assert release['Tracks'] == 4
+
+    tracks = release['Tracklist']
+    assert [track['number'] for track in tracks] == [None] * 4
+    assert [json.loads(track['details']) for track in tracks] == [
+        {'Position': "A1", 'Medium': 1},
+        {'Position': "A2", 'Medium': 1},
+        {'Position': "C1", 'Medium': 2, 'Artist': GET_LUCKY},
+        {'Position': "C2", 'Medium': 2},
+    ]
+    # Neither the track nor its recording has a length
+    assert tracks[3]['title'] == "Contact"
+    assert tracks[3]['length_ms'] is None
+    assert tracks[0]['length_ms'] == 274000
+
+
+def test_release_without_a_date():
+    release = release_group_data()['Releases'][2]
+    assert release['Country/Date'] == ""
+    assert release['Year'] is None
+    assert release['Label'] == ""
+    assert release['Format'] == "CD + DVD"
+    assert release['Tracks'] == 1
+
+    (track,) = release['Tracklist']
+    # The track has no length of its own, its recording does
+    assert track['length_ms'] == 248000
+    assert track['number'] == 1
+    assert json.loads(track['details']) == {'Medium': 1, 'Artist': GET_LUCKY}
+
+
+def test_media_formats_counts_repeats():
+    media = [{"format": "CD"}, {"format": "CD"}, {"format": "DVD"}, {}]
+    assert musicbrainz_json.media_formats(media) == "2×CD + DVD + (unknown)"
+
+
+def test_artist_properties():
+    properties = musicbrainz_json.artist_properties(load("artist.json"))
+    assert properties == {
+        "Type": "Group",
+        "Founded": "1993",
+        "Founded in": ["Paris"],
+        "Dissolved": "2021-02-22",
+        "Area": ["France"],
+        "IPI code": "00459214553, 00459214651",
+    }
+
+
+def test_person_life_span_is_born_and_died():
+    artist = {"type": "Person", "life-span": {"begin": "1973-04-05"}, "begin-area": {"name": "Miami"}}
+    assert musicbrainz_json.artist_properties(artist) == {
+        "Type": "Person", "Born": "1973-04-05", "Born in": ["Miami"]
+    }
+
+
+def test_fetch_artist_data():
+    artist_data = asyncio.run(musicbrainz_json.fetch_artist_data(FixtureClient(), ARTIST_ID))
+    assert artist_data['Artist ID'] == ARTIST_ID
+    assert artist_data['Wikipedia Extract'] is None
+    assert artist_data['Genres'] == ["electronic", "house", "french"]
+    assert artist_data['Properties']['Type'] == "Group"
+
+    # Oldest first; groups with secondary types (live, ...) are not on the page
+    assert [(album['Title'], album['Year']) for album in artist_data['Albums']] == [
+        ("Homework", "1997"), ("Random Access Memories", "2013")
+    ]
+    assert artist_data['Albums'][1]['Album ID'] == RELEASE_GROUP_ID
+    assert artist_data['Albums'][1]['Type'] == "Album"
+    assert [(single['Title'], single['Year'], single['Artist']) for single in artist_data['Singles']] == [
+        ("Untitled", "", "Daft Punk"), ("Get Lucky", "2013", GET_LUCKY)
+    ]
@@ -0,0 +1,36 @@
+from name_normalization import NameIndex, artist_keys, split_artists
+
+
+def test_protected_name_inside_collaboration():
+    assert split_artists("Tyler, The Creator & Kali Uchis") == ["Tyler, The Creator", "Kali Uchis"]
+
+
+def test_protected_name_before_feature():
+    assert split_artists("Chase & Status feat. Liam Bailey") == ["Chase & Status", "Liam Bailey"]
+
+
+def test_alias_in_another_script_is_not_a_participant():
+    assert split_artists("BTS (방탄소년단)") == ["BTS"]
+    assert split_artists("BTS (방탄소년단) & Halsey") == ["BTS", "Halsey"]
+
+
+def test_protected_name_alone():
+    assert split_artists("Tyler, The Creator") == ["Tyler, The Creator"]
+    assert split_artists("(G)I-DLE") == ["(G)I-DLE"]
+
+
+def test_collaborations_still_split():
+    assert split_artists("Bad Bunny x Jhay Cortez") == ["Bad Bunny", "Jhay Cortez"]
+    assert split_artists("Drake (feat. Rihanna)") == ["Drake", "Rihanna"]
+    assert split_artists("Beyonce & JAY-Z") == ["Beyonce", "JAY-Z"]
+
+
+def test_uppercase_x_is_not_a_separator():
+    assert split_artists("Malcolm X") == ["Malcolm X"]
+
+
+def test_keys_for_protected_names():
+    assert artist_keys("Tyler, The Creator & Kali Uchis") == ["tyler the creator", "kali uchis"]
+    index = NameIndex(["Chase & Status feat. Liam Bailey", "CHASE & STATUS"])
+    assert index.keys("Chase & Status feat. Liam Bailey") == ["chase status", "liam bailey"]
+    assert set(index.lookup_names()) == {"chase status", "liam bailey"}
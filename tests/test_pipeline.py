@@ -0,0 +1,37 @@
+import pytest
+
+import pipeline
+from pipeline import BatchWriter, WriterStopped
+
+
+def test_writes_in_batches(monkeypatch, recording_connection):
+    connection = recording_connection()
+    monkeypatch.setattr(pipeline, "get_database_connection", lambda: connection)
+    written = []
+
+    with BatchWriter("test", lambda cursor, items: written.extend(items), batch_size=3) as writer:
+        for item in range(7):
+            writer.put(item)
+
+    assert sorted(written) == list(range(7))
+    assert writer.written == 7 and writer.failed == 0
+    assert connection.closed
+
+
+def test_dead_writer_raises_instead_of_blocking(monkeypatch):
+    def unreachable():
+        raise ConnectionError("database unreachable")
+
+    monkeypatch.setattr(pipeline, "get_database_connection", unreachable)
+    monkeypatch.setattr(pipeline, "ALIVE_CHECK_INTERVAL", 0.05)
+    writer = BatchWriter("test", lambda cursor, items: None, max_queue=1).start()
+    writer.thread.join(timeout=5)
+
+    # The queue holds one item; without the liveness check the second put would block forever
+    with pytest.raises(WriterStopped) as stopped:
+        for item in range(3):
+            writer.put(item)
+    assert isinstance(stopped.value.__cause__, ConnectionError)
+
+    with pytest.raises(WriterStopped):
+        writer.close()
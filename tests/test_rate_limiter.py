@@ -0,0 +1,28 @@
+import asyncio
+import threading
+
+from rate_limiter import RateLimiter
+
+
+def test_acquire_async_does_not_block_the_event_loop(tmp_path):
+    limiter = RateLimiter("test", rate=100.0, burst=1, state_dir=str(tmp_path))
+    ticks = []
+
+    async def tick():
+        for _ in range(5):
+            ticks.append(len(ticks))
+            await asyncio.sleep(0.01)
+
+    async def run():
+        # Hold the state lock for a moment, as another process would hold the file lock
+        limiter.thread_lock.acquire()
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.2, limiter.thread_lock.release)
+        await asyncio.gather(limiter.acquire_async(), tick())
+
+    # A blocking acquire would deadlock the loop that is meant to release the lock
+    runner = threading.Thread(target=asyncio.run, args=(run(),), daemon=True)
+    runner.start()
+    runner.join(timeout=5)
+    assert not runner.is_alive()
+    assert len(ticks) == 5
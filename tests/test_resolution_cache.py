@@ -0,0 +1,71 @@
+import resolution_cache
+from resolution_cache import ResolutionCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(tmp_path, monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(resolution_cache.time, "time", clock)
+    return ResolutionCache("test", path=str(tmp_path / "cache.sqlite3"), **kwargs), clock
+
+
+def test_opened_on_first_use(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = ResolutionCache("test", path=str(path))
+    assert not path.exists()
+    assert cache.get("Drake") == (False, None)
+    assert path.exists()
+    cache.close()
+
+
+def test_positive_entries_expire_after_their_ttl(tmp_path, monkeypatch):
+    cache, clock = make_cache(tmp_path, monkeypatch, positive_ttl=100, negative_ttl=10)
+    cache.put("drake", ["Drake", "mbid"])
+    clock.now += 99
+    assert cache.get("drake") == (True, ["Drake", "mbid"])
+    clock.now += 1
+    assert cache.get("drake") == (False, None)
+    cache.close()
+
+
+def test_negative_entries_are_found_and_expire_sooner(tmp_path, monkeypatch):
+    cache, clock = make_cache(tmp_path, monkeypatch, positive_ttl=100, negative_ttl=10)
+    cache.put("nobody", None)
+    assert cache.get("nobody") == (True, None)
+    clock.now += 10
+    assert cache.get("nobody") == (False, None)
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(resolution_cache, "EVICT_EVERY", 4)
+    cache, clock = make_cache(tmp_path, monkeypatch, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+        clock.now += 1
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == (True, "a")
+    clock.now += 1
+    cache.put("d", "d")
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (False, None)
+    assert cache.get("a") == (True, "a")
+    assert cache.get("d") == (True, "d")
+    cache.close()
+
+
+def test_namespaces_are_separate(tmp_path, monkeypatch):
+    cache, _ = make_cache(tmp_path, monkeypatch)
+    other = ResolutionCache("other", path=cache.path)
+    cache.put("drake", "artist")
+    assert other.get("drake") == (False, None)
+    cache.close()
+    other.close()
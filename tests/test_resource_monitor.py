@@ -0,0 +1,29 @@
+import os
+
+import resource_monitor
+from resource_monitor import ResourceMonitor
+
+
+def test_metrics_dir_defaults_next_to_the_scripts():
+    if "RESOURCE_METRICS_DIR" not in os.environ:
+        assert resource_monitor.METRICS_DIR == os.path.join(os.path.dirname(os.path.abspath(resource_monitor.__file__)), "metrics")
+
+
+def test_stop_without_any_sample(monkeypatch, caplog):
+    monitor = ResourceMonitor("test", interval=60, metrics_dir=None)
+
+    def broken():
+        raise OSError("process gone")
+
+    monkeypatch.setattr(monitor, "sample", broken)
+    monitor.start()
+    monitor.stop()
+    assert monitor.latest() is None
+    assert "test resources: no samples recorded" in caplog.text
+
+
+def test_stop_exports_a_last_sample(tmp_path):
+    with ResourceMonitor("test", interval=60, metrics_dir=str(tmp_path)) as monitor:
+        monitor.gauge("queue_depth", lambda: 3)
+    assert monitor.latest()["queue_depth"] == 3
+    assert 'crawler_queue_depth{crawler="test"} 3' in (tmp_path / "test.prom").read_text()
@@ -0,0 +1,33 @@
+from datetime import date
+
+import snapshots
+
+
+# read_snapshot's SELECT answers with rows (artist, is_present, value)
+def previous(rows):
+    return lambda query, params: rows if query.startswith("SELECT") else []
+
+
+def inserted(conn):
+    return [row for _, rows in conn.executed("INSERT") for row in rows]
+
+
+def test_artists_differing_only_in_case_or_accents_are_one_artist(recording_connection):
+    day = date(2024, 10, 17)
+    conn = recording_connection(previous([("Rosé", True, 10), ("Drake", True, 5)]))
+    records = [("ROSÉ", 10), ("rose", 11), ("Drake", 6), ("DRAKE", 7)]
+
+    written = snapshots.write_snapshot(conn, "TopArtistsHistory", ("streams",), records, day)
+
+    # One row per artist key: Rosé is unchanged, Drake changed to its first value
+    assert inserted(conn) == [("Drake", day, True, 6)]
+    assert written == 1
+
+
+def test_dropped_artist_gets_a_tombstone_under_its_stored_spelling(recording_connection):
+    day = date(2024, 10, 17)
+    conn = recording_connection(previous([("Rosé", True, 10), ("Drake", True, 5)]))
+
+    snapshots.write_snapshot(conn, "TopArtistsHistory", ("streams",), [("drake", 5)], day)
+
+    assert inserted(conn) == [("Rosé", day, False, None)]
@@ -1,73 +1,70 @@
 import mysql.connector
 from datetime import datetime
 import logging
-from utils import create_database_connection, fetch_top_chart_data
+from utils import create_database_connection, fetch_changed_chart_table
+from fetch_state import remember_fetch
+from chart_loader import insert_records
+from chart_frame import to_chart_frame, frame_records
+from snapshots import write_snapshot
 from logging_config import setup_logging
 
 # URL to scrape
 URL = "https://kworb.net/spotify/artists.html"
 
+TOP_ARTISTS_COLUMNS = ("artist", "streams", "daily", "as_lead", "solo", "as_feature")
+
 # Set up logging
 setup_logging()
 
-def insert_top_artists(cursor, table_name, entry):
+# Replace the current list in TopArtists; its history lives in TopArtistsHistory
+def insert_top_artists(cursor, table_name, records):
     try:
-        artist = entry.get("Artist")
-        streams = entry.get("Streams", "0")
-        daily = entry.get("Daily", "0")
-        as_lead = entry.get("As lead", "0")
-        solo = entry.get("Solo", "0")
-        as_feature = entry.get("As feature", "0")
-        
-        # Log the values before insertion
-        logging.info(f"Artist: {artist} data is received")
-
-        insert_query = """
-        INSERT INTO TopArtists (artist, streams, daily, as_lead, solo, as_feature)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        
-        cursor.execute(insert_query, (
-            artist,
-            streams,
-            daily,
-            as_lead,
-            solo,
-            as_feature
-        ))
-        logging.info("Inserted artist data into database")
+        cursor.execute(f"DELETE FROM {table_name}")
+        inserted = insert_records(cursor, table_name, TOP_ARTISTS_COLUMNS, records)
+        logging.info(f"Inserted {inserted} artists into {table_name}")
+        return True
     except mysql.connector.Error as err:
         logging.error(f"Error inserting artist data: {err}")
-    except ValueError as ve:
-        logging.error(f"Value error: {ve}")
-    except KeyError as ke:
-        logging.error(f"Key error: {ke}")
+        return False
+
+# Store one parsed artists.html frame: the history delta first, then the current list
+def store_top_artists(conn, frame, snapshot_date):
+    table_name = "TopArtists"
+    records = frame_records(frame, TOP_ARTISTS_COLUMNS)
+
+    # Only artists whose numbers changed since the previous snapshot are written to history
+    if write_snapshot(conn, f"{table_name}History", TOP_ARTISTS_COLUMNS[1:], records, snapshot_date) is None:
+        return False
+
+    cursor = conn.cursor()
+    try:
+        if insert_top_artists(cursor, table_name, records):
+            conn.commit()
+            return True
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
 
 def fetch_and_store_artists():
-    rows = fetch_top_chart_data(URL)
-    if not rows:
-        logging.error("No data fetched from URL")
+    result, headers, rows = fetch_changed_chart_table(URL)
+    if headers is None:
+        return
+
+    frame = to_chart_frame(headers, rows)
+    if frame.empty:
+        logging.error("No rows parsed from URL")
         return
 
-    conn, cursor = create_database_connection(
-        host="localhost",
-        user="spotify_user",
-        password="password",
-        database="spotify_db"
-    )
+    conn, cursor = create_database_connection()
 
     if not conn or not cursor:
         logging.error("Database connection failed")
         return
 
-    table_name = "TopArtists"
-    conn.commit()
-
-    for entry in rows:
-        logging.info(f"Processing entry: {entry}")
-        insert_top_artists(cursor, table_name, entry)
+    if store_top_artists(conn, frame, datetime.now().date()):
+        remember_fetch(result)
 
-    conn.commit()
     cursor.close()
     conn.close()
     logging.info("Database connection closed")
@@ -1,65 +1,71 @@
 import mysql.connector
 from datetime import datetime
 import logging
-from utils import create_database_connection, fetch_top_chart_data
+from utils import create_database_connection, fetch_changed_chart_table
+from fetch_state import remember_fetch
+from chart_loader import insert_records
+from chart_frame import to_chart_frame, frame_records
+from snapshots import write_snapshot
 from logging_config import setup_logging
 
 # URL to scrape
 URL = "https://kworb.net/spotify/listeners.html"
 
+TOP_LISTENERS_COLUMNS = ("artist", "peak_listeners", "listeners", "peak_position")
+
 # Set up logging
 setup_logging()
 
 
-def insert_top_listeners(cursor, table_name, entry):
+# Replace the current list in TopListeners; its history lives in TopListenersHistory
+def insert_top_listeners(cursor, table_name, records):
     try:
-        artist = entry.get("Artist")
-        peak_listeners = entry.get("PkListeners", "0").replace(',', '')
-        listeners = entry.get("Listeners", "0").replace(',', '')
-        peak_position = entry.get("Peak", "0").replace(',', '')
-
-        logging.info(f"Inserting: Artist: {artist}, Peak Listeners: {peak_listeners}, Listeners: {listeners}, Peak Position: {peak_position}")
-
-        insert_query = """
-        INSERT INTO TopListeners (artist, peak_listeners, listeners, peak_position)
-        VALUES (%s, %s, %s, %s)
-        """
-        
-        cursor.execute(insert_query, (
-            artist,
-            peak_listeners,
-            listeners,
-            peak_position
-        ))
-        logging.info("Inserted artist data into database")
+        cursor.execute(f"DELETE FROM {table_name}")
+        inserted = insert_records(cursor, table_name, TOP_LISTENERS_COLUMNS, records)
+        logging.info(f"Inserted {inserted} artists into {table_name}")
+        return True
     except mysql.connector.Error as err:
         logging.error(f"Error inserting artist data: {err}")
+        return False
+
+# Store one parsed listeners.html frame: the history delta first, then the current list
+def store_top_listeners(conn, frame, snapshot_date):
+    table_name = "TopListeners"
+    records = frame_records(frame, TOP_LISTENERS_COLUMNS)
+
+    # Only artists whose numbers changed since the previous snapshot are written to history
+    if write_snapshot(conn, f"{table_name}History", TOP_LISTENERS_COLUMNS[1:], records, snapshot_date) is None:
+        return False
+
+    cursor = conn.cursor()
+    try:
+        if insert_top_listeners(cursor, table_name, records):
+            conn.commit()
+            return True
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
 
 def fetch_and_store_listeners():
-    rows = fetch_top_chart_data(URL)
-    if not rows:
-        logging.error("No data fetched from URL")
+    result, headers, rows = fetch_changed_chart_table(URL)
+    if headers is None:
+        return
+
+    frame = to_chart_frame(headers, rows)
+    if frame.empty:
+        logging.error("No rows parsed from URL")
         return
 
-    conn, cursor = create_database_connection(
-        host="localhost",
-        user="spotify_user",
-        password="password",
-        database="spotify_db"
-    )
+    conn, cursor = create_database_connection()
 
     if not conn or not cursor:
         logging.error("Database connection failed")
         return
 
-    table_name = "TopListeners"
-    conn.commit()
-
-    for entry in rows:
-        logging.info(f"Processing entry: {entry}")
-        insert_top_listeners(cursor, table_name, entry)
+    if store_top_listeners(conn, frame, datetime.now().date()):
+        remember_fetch(result)
 
-    conn.commit()
     cursor.close()
     conn.close()
     logging.info("Database connection closed")
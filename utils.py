@@ -1,42 +1,162 @@
+import io
 import mysql.connector
 import logging
 from bs4 import BeautifulSoup
 import requests
+from fetch_state import fetch_if_changed
+from db_connection import get_database_connection
 
-def fetch_top_chart_data(url):
+# lxml is optional; without it chart pages are parsed with BeautifulSoup
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# kworb serves UTF-8 without always declaring it
+CHART_ENCODING = "utf-8"
+
+
+def cell_text(element):
+    return "".join(element.itertext()).strip()
+
+
+# Stream the first "sortable" table with lxml, yielding the header tuple first
+# and then one tuple of cell texts per row. Finished rows are freed as we go.
+def iter_chart_rows_lxml(content, encoding=CHART_ENCODING):
+    in_table = False
+    headers = []
+    for event, element in etree.iterparse(io.BytesIO(content), events=("start", "end"), html=True, encoding=encoding):
+        tag = element.tag
+        if event == "start":
+            if tag == "table" and not in_table and "sortable" in (element.get("class") or "").split():
+                in_table = True
+            continue
+        if not in_table:
+            continue
+        if tag == "tr":
+            if not headers:
+                headers = [cell_text(th) for th in element.iter("th")]
+                if headers:
+                    yield tuple(headers)
+            else:
+                cells = tuple(cell_text(td) for td in element.iter("td"))
+                if cells:
+                    yield cells
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        elif tag == "table":
+            return
+
+
+# Same contract as iter_chart_rows_lxml, built on the BeautifulSoup tree
+def iter_chart_rows_soup(content, encoding=CHART_ENCODING):
+    soup = BeautifulSoup(content, "html.parser", from_encoding=encoding)
+    table = soup.find("table", {"class": "sortable"})
+    if not table:
+        return
+    yield tuple(th.text.strip() for th in table.find_all("th"))
+    for tr in table.find_all("tr")[1:]:
+        cells = tuple(td.text.strip() for td in tr.find_all("td"))
+        if cells:
+            yield cells
+
+
+# Parse a kworb chart page into (headers, rows) where rows is a generator of tuples
+def parse_chart_table(content):
+    rows = iter_chart_rows_lxml(content) if etree is not None else iter_chart_rows_soup(content)
+    try:
+        headers = next(rows)
+    except StopIteration:
+        return None, None
+    return headers, rows
+
+
+def fetch_page(url):
     try:
-        response = requests.get(url)
+        response = requests.get(url, timeout=30)
         response.raise_for_status()
         logging.info("Data fetched successfully")
+        return response.content
     except requests.RequestException as e:
         logging.error(f"Error fetching data from {url}: {e}")
         return None
 
-    soup = BeautifulSoup(response.content, "html.parser")
-    table = soup.find("table", {"class": "sortable"})
-    
-    if not table:
+
+# Fetch a chart page and return (headers, row generator), or (None, None) on failure
+def fetch_top_chart_table(url):
+    content = fetch_page(url)
+    if content is None:
+        return None, None
+
+    headers, rows = parse_chart_table(content)
+    if headers is None:
+        logging.error("No table found on the page")
+    return headers, rows
+
+
+# Fetch a chart page only if it changed since the last remembered ingest.
+# Returns (fetch result, headers, rows); headers is None when there is nothing to load.
+def fetch_changed_chart_table(url):
+    result = fetch_if_changed(url)
+    if result is None:
+        logging.error("No data fetched from URL")
+        return None, None, None
+    if not result.changed:
+        logging.info(f"Skipping {url}, chart unchanged since last ingest")
+        return result, None, None
+
+    headers, rows = parse_chart_table(result.content)
+    if headers is None:
         logging.error("No table found on the page")
+    return result, headers, rows
+
+
+def fetch_top_chart_data(url):
+    headers, rows = fetch_top_chart_table(url)
+    if headers is None:
         return None
-    
-    headers = [th.text.strip() for th in table.find_all("th")]
-    rows = []
-    for tr in table.find_all("tr")[1:]:
-        cells = tr.find_all("td")
-        row = {headers[i]: cell.text.strip() for i, cell in enumerate(cells)}
-        rows.append(row)
 
+    rows = [dict(zip(headers, cells)) for cells in rows]
     logging.info("Data parsed successfully")
     return rows
 
-def create_database_connection(host, user, password, database):
+# "1,234" / "+56" -> int; None for empty or unreadable values
+def parse_int(value):
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    cleaned = str(value).replace(',', '').replace('+', '').strip()
+    try:
+        return int(cleaned)
+    except ValueError:
+        return None
+
+
+# Track lengths as shown by MusicBrainz ("3:45", "1:02:33") -> milliseconds; None for "?:??"
+def parse_duration_ms(value):
+    if value is None:
+        return None
+    parts = str(value).strip().split(':')
+    if len(parts) < 2 or not all(part.isdigit() for part in parts):
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds * 1000
+
+
+# Track numbers are usually digits, but vinyl sides use "A1", "B2"; those return None
+def parse_track_number(value):
+    value = str(value).strip() if value is not None else ""
+    return int(value) if value.isdigit() else None
+
+
+# Leases a connection from the shared pool configured by the DB_* environment variables
+def create_database_connection():
     try:
-        conn = mysql.connector.connect(
-            host='localhost',
-            user='spotify_user',
-            password='password',
-            database='spotify_db'
-        )
+        conn = get_database_connection()
         cursor = conn.cursor()
         logging.info("Database connection established")
         return conn, cursor
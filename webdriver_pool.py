@@ -0,0 +1,156 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+import psutil
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import (
+    NoSuchElementException, TimeoutException, StaleElementReferenceException, WebDriverException
+)
+from webdriver_manager.chrome import ChromeDriverManager
+
+logger = logging.getLogger(__name__)
+
+# Long-lived headless Chrome instances shared by the Selenium crawlers. A task leases a
+# browser, uses it for one page and hands it back; between leases the browser is reset,
+# and it is replaced after MAX_PAGES pages or once Chrome's RSS passes MAX_RSS_MB.
+#
+#   with driver_pool.lease() as driver:
+#       driver.get(url)
+
+POOL_SIZE = int(os.environ.get("WEBDRIVER_POOL_SIZE", "5"))
+MAX_PAGES = int(os.environ.get("WEBDRIVER_MAX_PAGES", "100"))
+MAX_RSS_MB = int(os.environ.get("WEBDRIVER_MAX_RSS_MB", "1024"))
+
+# Nothing the scrapers read lives in images, fonts or stylesheets
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.css",
+]
+
+# Scrape errors that say nothing about the browser's health
+PAGE_ERRORS = (NoSuchElementException, TimeoutException, StaleElementReferenceException)
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+# Resolve chromedriver once per process instead of a driver-manager check per browser
+def driver_path():
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = os.environ.get("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+            logger.info(f"Using chromedriver at {_driver_path}")
+        return _driver_path
+
+
+def chrome_options():
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--log-level=3")  # Suppress non-critical logs
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.fonts": 2,
+    })
+    # Return once the DOM is parsed, without waiting for subresources
+    chrome_options.page_load_strategy = "eager"
+    return chrome_options
+
+
+def start_driver():
+    driver = webdriver.Chrome(service=Service(driver_path()), options=chrome_options())
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+
+# Resident memory of chromedriver and the Chrome processes it started, in MB
+def driver_rss_mb(driver):
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        processes = [process] + process.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / 1024 ** 2
+    except (psutil.Error, AttributeError):
+        return 0
+
+
+class WebDriverPool:
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES, max_rss_mb=MAX_RSS_MB):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = queue.LifoQueue()
+        self.pages = {}
+        self.started = 0
+        self.recycled = 0
+
+    # Borrow a browser; at most `size` are leased at once
+    @contextmanager
+    def lease(self):
+        with self.slots:
+            driver = self._take()
+            healthy = True
+            try:
+                yield driver
+            except PAGE_ERRORS:
+                raise
+            except WebDriverException:
+                # May mean a crashed or wedged browser. Anything else (odd markup tripping the
+                # scraper, say) says nothing about the browser, which is reset and handed back.
+                healthy = False
+                raise
+            finally:
+                self._give_back(driver, healthy)
+
+    def _take(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            driver = start_driver()
+            self.pages[id(driver)] = 0
+            self.started += 1
+            return driver
+
+    def _give_back(self, driver, healthy):
+        self.pages[id(driver)] += 1
+        if healthy and self.pages[id(driver)] < self.max_pages and driver_rss_mb(driver) < self.max_rss_mb:
+            try:
+                # Drop page state so the next task starts clean
+                driver.delete_all_cookies()
+                driver.get("about:blank")
+                self.idle.put(driver)
+                return
+            except WebDriverException:
+                pass
+        self._quit(driver)
+        self.recycled += 1
+
+    def _quit(self, driver):
+        self.pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            logger.warning(f"Error quitting Chrome: {e}")
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self.idle.get_nowait())
+            except queue.Empty:
+                break
+        if self.started:
+            logger.info(f"WebDriver pool closed: {self.started} browsers started, {self.recycled} recycled")
+
+
+driver_pool = WebDriverPool()
+atexit.register(driver_pool.close)